@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+페이지 조립 + 이미지 이름 간소화 벤치마크 (convert_pdf page_chunks 모드)
+- 합성 문서: 2,000페이지, 이미지 5,000개
+- 기존 방식 (md_text += ..., 이미지마다 문서 전체 replace) 과 현재 방식 비교
+
+사용법:
+    python benchmarks/bench_page_assembly.py
+    python benchmarks/bench_page_assembly.py --pages 500 --images 1000
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf_to_markdown_engine import PipelineEngine, assemble_pages  # noqa: E402
+
+
+def make_pages(pages, images, image_folder):
+    """페이지마다 본문과 표, 이미지 참조가 섞인 합성 페이지 텍스트 생성"""
+    page_texts = []
+    per_page = [images // pages + (1 if p < images % pages else 0) for p in range(pages)]
+    for p, count in enumerate(per_page):
+        lines = [f"## Section {p}", "", "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4, ""]
+        lines += ["| Parameter | Symbol | MIN | TYP | MAX |", "|---|---|---|---|---|"]
+        lines += [f"| VDD{r} | V | 1.{r} | 3.3 | 5.{r} |" for r in range(8)]
+        for k in range(count):
+            lines.append(f"![]({image_folder}/doc.pdf-{p}-{k}.png)")
+        page_texts.append("\n".join(lines) + "\n")
+    return page_texts
+
+
+def make_images(image_folder, pages, images):
+    image_folder.mkdir(parents=True)
+    per_page = [images // pages + (1 if p < images % pages else 0) for p in range(pages)]
+    for p, count in enumerate(per_page):
+        for k in range(count):
+            (image_folder / f"doc.pdf-{p}-{k}.png").touch()
+
+
+def legacy_assemble(page_texts):
+    md_text = ""
+    for i, text in enumerate(page_texts):
+        md_text += text
+        md_text += f"\n\n---\n<!-- Page {i+1} -->\n\n"
+    return md_text
+
+
+def legacy_simplify(image_folder, md_text, rel_folder):
+    image_files = sorted(image_folder.glob("*.*"))
+    for i, img_path in enumerate(image_files, 1):
+        new_name = f"img_{i:03d}{img_path.suffix.lower()}"
+        new_path = image_folder / new_name
+        if img_path != new_path:
+            shutil.move(str(img_path), str(new_path))
+        md_text = md_text.replace(img_path.name, new_name)
+    md_text = md_text.replace(str(image_folder).replace("\\", "/"), rel_folder)
+    md_text = md_text.replace(str(image_folder), rel_folder)
+    return md_text
+
+
+def run(label, assemble, simplify, pages, images, workdir):
+    image_folder = workdir / label / "doc_images"
+    make_images(image_folder, pages, images)
+    page_texts = make_pages(pages, images, image_folder)
+
+    started = time.perf_counter()
+    md_text = assemble(page_texts)
+    assembled = time.perf_counter()
+    md_text = simplify(image_folder, md_text, "./doc_images")
+    finished = time.perf_counter()
+    return md_text, assembled - started, finished - assembled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페이지 조립/이미지 이름 간소화 벤치마크")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--images", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    engine = PipelineEngine()
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        old_text, old_assemble, old_simplify = run("legacy", legacy_assemble, legacy_simplify,
+                                                   args.pages, args.images, workdir)
+        new_text, new_assemble, new_simplify = run(
+            "current", lambda texts: assemble_pages(texts, True), engine.simplify_image_names,
+            args.pages, args.images, workdir)
+
+    # 임시 폴더 경로만 다르므로 상대 경로로 바뀐 결과는 같아야 함
+    same = old_text == new_text
+    print(f"문서: {args.pages:,}페이지, 이미지 {args.images:,}개, {len(new_text) / 1024 / 1024:.1f}MB")
+    print(f"{'단계':<16}{'기존':>10}{'현재':>10}{'배율':>10}")
+    for name, old, new in (("페이지 조립", old_assemble, new_assemble),
+                           ("이미지 이름 변경", old_simplify, new_simplify),
+                           ("합계", old_assemble + old_simplify, new_assemble + new_simplify)):
+        print(f"{name:<16}{old:>9.3f}s{new:>9.3f}s{old / new if new else 0:>9.1f}x")
+    print(f"결과 동일: {'예' if same else '아니오'}")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
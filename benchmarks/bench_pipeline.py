@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+오프라인 처리량 벤치마크 (Google 번역 / 청크 분할 / GLM 오류 수정 / 전체 파이프라인)
+- 실제 서비스 대신 로컬 가짜 서버(fake_services.py) 사용: 지연, 429(초당 요청 한도), 500 주입
+- 합성 마크다운 코퍼스 (small/medium/large), pymupdf가 있으면 같은 내용의 합성 PDF로 전체 파이프라인도 측정
+- 항목마다 새 프로세스에서 실행해 최고 RSS를 따로 잼
+- docs/min, lines/s, tokens/s(입력 토큰 추정치), 최고 RSS 출력
+
+사용법:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes small,medium,large --cases translate,glm --error-rate 0.02
+    python benchmarks/bench_pipeline.py --latency 0.2 --glm-tps 500 --glm-stream --json out/bench.json
+"""
+
+import argparse
+import importlib.util
+import json
+import random
+import sys
+import tempfile
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_services import FakeGLM, FakeGoogleTranslate, FakeLibreTranslate, use_fake_google  # noqa: E402
+from pdf_to_markdown_engine import (  # noqa: E402
+    GLM_CHUNK_TOKENS, TRANSLATION_BACKENDS, PipelineEngine, PipelineOptions, estimate_tokens,
+    split_markdown_into_chunks,
+)
+
+# 크기별 (문서 수, 문서당 줄 수)
+SIZES = {
+    "small": (4, 250),
+    "medium": (8, 1_000),
+    "large": (16, 4_000),
+}
+CASES = ("translate", "chunk", "glm", "pipeline")
+# 항목별 필요한 선택 패키지 (없으면 건너뜀)
+REQUIRES = {
+    "translate": (),
+    "chunk": (),
+    "glm": ("httpx",),
+    "pipeline": ("pymupdf", "pymupdf4llm", "httpx"),
+}
+# 번역 항목(translate, pipeline)에 추가로 필요한 번역 백엔드 패키지
+BACKEND_REQUIRES = {"google": ("deep_translator",), "glossary": (), "libretranslate": ("httpx",)}
+
+WORDS = ("supply voltage current output input register clock timer channel mode enable the device when is "
+         "configured to operate in low power and high speed data transfer interrupt flag reset value bit "
+         "typical maximum minimum temperature range conditions").split()
+CJK_SENTENCES = ("전원 전압이 범위를 벗어나면 장치가 리셋됩니다.", "出力電流は最大値を超えないこと。", "该寄存器在复位后为零。")
+
+
+def sentence(rng, words=(8, 20)):
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(*words)))
+    return text[0].upper() + text[1:] + "."
+
+
+def make_markdown(lines, seed=0, cjk=True):
+    """pymupdf4llm 출력과 비슷한 합성 문서 (제목, 문단, 표, 글머리, 코드, 페이지 구분선과 흔한 결함 포함)"""
+    rng = random.Random(seed)
+    out = []
+    page = 1
+    while len(out) < lines:
+        kind = rng.random()
+        if kind < 0.08:
+            out += [f"## {rng.randint(1, 9)}.{rng.randint(1, 9)} {sentence(rng, (2, 4))[:-1]}", ""]
+        elif kind < 0.45:
+            text = " ".join(sentence(rng) for _ in range(rng.randint(1, 3)))
+            if cjk and rng.random() < 0.2:
+                text += " " + rng.choice(CJK_SENTENCES)
+            out += [text, ""]
+        elif kind < 0.65:
+            columns = rng.randint(3, 6)
+            out.append("| " + " | ".join(rng.choice(WORDS).title() for _ in range(columns)) + " |")
+            if rng.random() < 0.8:
+                out.append("|" + "---|" * columns)
+            for _ in range(rng.randint(2, 8)):
+                cells = [f"{rng.uniform(0, 5):.2f}" for _ in range(columns)]
+                if rng.random() < 0.15:
+                    cells[0] = f"{rng.choice(WORDS)}<br>{rng.choice(WORDS)}"
+                out.append("| " + " | ".join(cells) + " |")
+            out.append("")
+        elif kind < 0.82:
+            for _ in range(rng.randint(2, 5)):
+                bullet = rng.choice(("- ", "- ", "- ", "z ", "L "))
+                out.append(bullet + sentence(rng, (4, 10)))
+            out.append("")
+        elif kind < 0.88:
+            out += ["```c", f"#define REG_{rng.randint(0, 255):02X} 0x{rng.randint(0, 65535):04X}",
+                    "reg |= (1 << 3);", "```", ""]
+        else:
+            if rng.random() < 0.5:
+                out += [str(page), ""]
+            page += 1
+            out += ["---", f"<!-- Page {page} -->", ""]
+    return "\n".join(out[:lines]) + "\n"
+
+
+def write_pdf(path, text, lines_per_page=60):
+    """합성 문서를 글자만 있는 PDF로 저장 (pymupdf 필요)"""
+    import pymupdf
+
+    wrapped = []
+    for line in text.split("\n"):
+        wrapped.extend(textwrap.wrap(line, 110) or [""])
+    doc = pymupdf.open()
+    for start in range(0, len(wrapped), lines_per_page):
+        page = doc.new_page()
+        page.insert_text((40, 50), "\n".join(wrapped[start:start + lines_per_page]), fontsize=7)
+    doc.save(str(path))
+    doc.close()
+
+
+def write_glossary(path):
+    """합성 코퍼스 단어와 자주 나오는 구절의 용어집 (glossary 백엔드용 TSV)"""
+    entries = {word: f"<{word}>" for word in WORDS}
+    entries.update({"supply voltage": "공급 전압", "low power": "저전력", "reset value": "리셋 값"})
+    Path(path).write_text("".join(f"{source}\t{target}\n" for source, target in entries.items()), encoding='utf-8')
+
+
+def peak_rss_mb():
+    """현재 프로세스의 최고 RSS (MB, resource 모듈이 없으면 None)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(case, size, config):
+    """항목 하나 실행 (별도 프로세스), 측정 결과 dict 반환"""
+    docs, lines = SIZES[size]
+    corpus = [make_markdown(lines, seed=i, cjk=case != "pipeline") for i in range(docs)]
+    options = PipelineOptions(
+        api_key="bench",
+        glm_api_url=config["glm_url"],
+        translate_workers=config["translate_workers"],
+        translate_rate=config["translate_rate"],
+        glm_concurrency=config["glm_concurrency"],
+        glm_max_concurrency=max(config["glm_concurrency"], 8),
+        glm_retries=config["glm_retries"],
+        glm_skip_clean=not config["glm_all"],
+        glm_stream=config["glm_stream"],
+        glm_async=config["glm_async"],
+        translate_backend=config["translate_backend"],
+        translate_url=config["libre_url"],
+    )
+    engine = PipelineEngine(options)
+    if config["translate_backend"] == "google" and case in ("translate", "pipeline"):
+        use_fake_google(config["google_url"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if config["translate_backend"] == "glossary":
+            options.glossary = str(Path(tmp) / "glossary.tsv")
+            write_glossary(options.glossary)
+        paths = []
+        if case == "pipeline":
+            for i, text in enumerate(corpus):
+                paths.append(Path(tmp) / f"doc_{i:03d}.pdf")
+                write_pdf(paths[-1], text)
+            options.target_lang = "ko"
+            options.fix_errors = True
+            options.output_folder = str(Path(tmp) / "out")
+
+        started = time.perf_counter()
+        if case == "translate":
+            for text in corpus:
+                engine.translate_with_google(text, "auto", "ko")
+        elif case == "chunk":
+            for text in corpus:
+                split_markdown_into_chunks(text, GLM_CHUNK_TOKENS)
+        elif case == "glm":
+            for i, text in enumerate(corpus):
+                engine.source_name = f"doc_{i:03d}"
+                engine.fix_with_glm_parallel(text)
+        else:
+            results = engine.run_batch(paths)
+            errors = [str(r) for r in results.values() if isinstance(r, Exception)]
+            if errors:
+                raise RuntimeError(errors[0])
+        elapsed = time.perf_counter() - started
+        engine.close()
+
+    total_lines = sum(text.count("\n") for text in corpus)
+    tokens = sum(estimate_tokens(text) for text in corpus)
+    return {
+        "case": case,
+        "size": size,
+        "docs": docs,
+        "lines": total_lines,
+        "tokens": tokens,
+        "seconds": elapsed,
+        "docs_per_min": docs / elapsed * 60 if elapsed else 0.0,
+        "lines_per_sec": total_lines / elapsed if elapsed else 0.0,
+        "tokens_per_sec": tokens / elapsed if elapsed else 0.0,
+        "glm_tokens": engine.metrics.snapshot()["total"]["total_tokens"],
+        "failures": engine.failures,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 처리량 벤치마크 (로컬 가짜 Google/GLM 서버)")
+    parser.add_argument("--sizes", default="small,medium", help=f"코퍼스 크기 ({','.join(SIZES)})")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"측정 항목 ({','.join(CASES)})")
+    parser.add_argument("--latency", type=float, default=0.05, help="가짜 서버 요청당 평균 지연 초 (기본: 0.05)")
+    parser.add_argument("--google-rate-limit", type=float, default=40, help="Google 초당 요청 한도, 넘으면 429 (기본: 40)")
+    parser.add_argument("--glm-rate-limit", type=float, default=0, help="GLM 초당 요청 한도 (기본: 제한 없음)")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="500 응답 확률 (기본: 0.01)")
+    parser.add_argument("--marker-error-rate", type=float, default=0.0,
+                        help="Google 응답에서 줄 번호 마커가 사라질 확률 (기본: 0)")
+    parser.add_argument("--glm-tps", type=float, default=0, help="GLM 출력 생성 속도 토큰/s (기본: 즉시)")
+    parser.add_argument("--translate-workers", type=int, default=4)
+    parser.add_argument("--translate-rate", type=float, default=20.0)
+    parser.add_argument("--translate-backend", choices=TRANSLATION_BACKENDS, default="google",
+                        help="번역 백엔드 (glossary는 합성 용어집, libretranslate는 가짜 로컬 서버 사용)")
+    parser.add_argument("--glm-concurrency", type=int, default=4)
+    parser.add_argument("--glm-retries", type=int, default=3)
+    parser.add_argument("--glm-all", action="store_true", help="결함 없는 청크도 GLM에 보냄")
+    parser.add_argument("--glm-stream", action="store_true", help="GLM SSE 스트리밍 경로")
+    parser.add_argument("--glm-async", action="store_true", help="GLM asyncio 경로")
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args(argv)
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = [s for s in sizes if s not in SIZES] + [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"알 수 없는 값: {', '.join(unknown)}")
+    for case in list(cases):
+        requires = REQUIRES[case]
+        if case in ("translate", "pipeline"):
+            requires += BACKEND_REQUIRES[args.translate_backend]
+        missing = [name for name in requires if importlib.util.find_spec(name) is None]
+        if missing:
+            print(f"{', '.join(missing)} 패키지가 없어 {case} 항목은 건너뜁니다")
+            cases.remove(case)
+
+    faults = {"latency": args.latency, "error_rate": args.error_rate}
+    results = []
+    with FakeGoogleTranslate(rate_limit=args.google_rate_limit, marker_error_rate=args.marker_error_rate,
+                             **faults) as google, \
+            FakeLibreTranslate(**faults) as libre, \
+            FakeGLM(tokens_per_second=args.glm_tps, rate_limit=args.glm_rate_limit, **faults) as glm:
+        config = {
+            "google_url": google.url,
+            "libre_url": libre.url,
+            "translate_backend": args.translate_backend,
+            "glm_url": glm.url,
+            "translate_workers": args.translate_workers,
+            "translate_rate": args.translate_rate,
+            "glm_concurrency": args.glm_concurrency,
+            "glm_retries": args.glm_retries,
+            "glm_all": args.glm_all,
+            "glm_stream": args.glm_stream,
+            "glm_async": args.glm_async,
+        }
+        print(f"{'항목':<10}{'크기':<8}{'문서':>5}{'줄':>9}{'초':>8}{'docs/min':>10}{'lines/s':>10}"
+              f"{'tokens/s':>11}{'RSS MB':>8}{'429':>6}{'500':>5}{'실패':>5}")
+        for size in sizes:
+            for case in cases:
+                before = {"google": dict(google.stats), "libre": dict(libre.stats), "glm": dict(glm.stats)}
+                # 항목마다 새 프로세스 (최고 RSS를 따로 재고, 앞 항목의 캐시/메모리 영향 제거)
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                    result = pool.submit(run_case, case, size, config).result()
+                for name, service in (("google", google), ("libre", libre), ("glm", glm)):
+                    for key in ("requests", "throttled", "errors"):
+                        result[f"{name}_{key}"] = service.stats[key] - before[name][key]
+                results.append(result)
+                rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "-"
+                print(f"{case:<10}{size:<8}{result['docs']:>5}{result['lines']:>9,}{result['seconds']:>8.2f}"
+                      f"{result['docs_per_min']:>10.1f}{result['lines_per_sec']:>10,.0f}"
+                      f"{result['tokens_per_sec']:>11,.0f}{rss:>8}"
+                      f"{sum(result[f'{name}_throttled'] for name in ('google', 'libre', 'glm')):>6}"
+                      f"{sum(result[f'{name}_errors'] for name in ('google', 'libre', 'glm')):>5}"
+                      f"{result['failures']:>5}")
+
+    print("tokens/s는 입력 문서의 토큰 추정치 기준 (GLM이 실제로 처리한 토큰은 JSON의 glm_tokens)")
+    if args.json:
+        path = Path(args.json)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+벤치마크용 로컬 가짜 서버 (Google 번역 / LibreTranslate / GLM 채팅 완성)
+- 실제 서비스 대신 127.0.0.1에서 응답하므로 네트워크 없이 같은 조건으로 반복 측정 가능
+- 요청마다 지연(평균 ± 흔들림), 초당 요청 한도 초과 시 429, 일정 확률로 500 주입
+- GLM은 생성 속도(토큰/s)를 흉내 내며, stream=true 요청에는 SSE(chunked)로 조각을 보냄
+
+사용 예:
+    with FakeGoogleTranslate(latency=0.05, rate_limit=20) as google, FakeGLM(error_rate=0.01) as glm:
+        use_fake_google(google.url)
+        options = PipelineOptions(glm_api_url=glm.url, ...)
+"""
+
+import html
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MARKER_RE = re.compile(r'(<#\d+#>)')
+BR_RE = re.compile(r'\s*<br\s*/?>\s*', re.IGNORECASE)
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """클라이언트가 keep-alive 연결을 끊을 때 생기는 오류는 출력하지 않음"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeService:
+    """지연/속도 제한/오류를 주입하는 로컬 HTTP 서버 (백그라운드 스레드, with 문으로 시작/종료)
+
+    latency: 요청당 평균 지연(초), jitter 비율만큼 균등 분포로 흔들림
+    rate_limit: 초당 허용 요청 수 (최근 1초 창 기준, 넘으면 429, 0이면 제한 없음)
+    error_rate: 500 응답 확률
+    """
+
+    def __init__(self, latency=0.05, jitter=0.5, rate_limit=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0}
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive (공유 연결 풀 재사용 측정)
+
+            def do_GET(self):
+                service.dispatch(self, "GET")
+
+            def do_POST(self):
+                service.dispatch(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = QuietHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name=type(self).__name__, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def admit(self):
+        """이번 요청에 돌려줄 오류 상태 코드 (정상이면 None)"""
+        now = time.monotonic()
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.rate_limit > 0:
+                while self.window and now - self.window[0] >= 1.0:
+                    self.window.popleft()
+                if len(self.window) >= self.rate_limit:
+                    self.stats["throttled"] += 1
+                    return 429
+                self.window.append(now)
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 500
+            delay = self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter)
+        time.sleep(max(0.0, delay))
+        return None
+
+    def dispatch(self, request, method):
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        status = self.admit()
+        if status is not None:
+            self.send(request, status, b'{"error": {"message": "injected"}}', "application/json")
+            return
+        self.handle(request, method, body)
+
+    def send(self, request, status, body, content_type):
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def handle(self, request, method, body):
+        raise NotImplementedError
+
+
+class FakeGoogleTranslate(FakeService):
+    """translate.google.com/m 대체 - 번호 마커(<#N#>)는 그대로 두고 줄마다 "[대상 언어]"를 붙여 돌려줌
+
+    marker_error_rate: 마커 하나가 번역 중에 사라질 확률 (실제 번역기가 마커를 먹는 경우 흉내)
+    """
+
+    path = "/m"
+
+    def __init__(self, marker_error_rate=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.marker_error_rate = marker_error_rate
+        self.stats["dropped_markers"] = 0
+
+    def drop_marker(self, match):
+        with self.lock:
+            if self.random.random() >= self.marker_error_rate:
+                return match.group(0)
+            self.stats["dropped_markers"] += 1
+        return ""
+
+    def handle(self, request, method, body):
+        params = parse_qs(urlparse(request.path).query)
+        text = params.get("q", [""])[0]
+        target = params.get("tl", ["ko"])[0]
+        translated = "\n".join(f"{line} [{target}]" if line.strip() and not MARKER_RE.fullmatch(line) else line
+                               for line in text.split("\n"))
+        if self.marker_error_rate:
+            translated = MARKER_RE.sub(self.drop_marker, translated)
+        page = f'<html><body><div class="result-container">{html.escape(translated)}</div></body></html>'
+        self.send(request, 200, page.encode('utf-8'), "text/html; charset=utf-8")
+
+
+class FakeLibreTranslate(FakeService):
+    """LibreTranslate /translate 대체 (자체 호스팅 번역 서버) - q의 문자열마다 "[대상 언어]"를 붙여 돌려줌"""
+
+    path = "/translate"
+
+    def handle(self, request, method, body):
+        payload = json.loads(body or b"{}")
+        q = payload.get("q", "")
+        target = payload.get("target", "ko")
+        translated = [f"{text} [{target}]" for text in (q if isinstance(q, list) else [q])]
+        data = {"translatedText": translated if isinstance(q, list) else translated[0]}
+        self.send(request, 200, json.dumps(data, ensure_ascii=False).encode('utf-8'), "application/json")
+
+
+class FakeGLM(FakeService):
+    """/api/paas/v4/chat/completions 대체 - 사용자 메시지의 마크다운에서 <br> 셀 분리만 고쳐 돌려줌
+
+    tokens_per_second: 출력 생성 속도 (0이면 즉시), 스트리밍이면 조각마다 나눠서 기다림
+    """
+
+    path = "/api/paas/v4/chat/completions"
+
+    def __init__(self, tokens_per_second=0.0, stream_chunk_chars=64, **kwargs):
+        super().__init__(**kwargs)
+        self.tokens_per_second = tokens_per_second
+        self.stream_chunk_chars = stream_chunk_chars
+
+    def handle(self, request, method, body):
+        payload = json.loads(body or b"{}")
+        messages = payload.get("messages") or [{"content": ""}]
+        prompt = "".join(message.get("content", "") for message in messages)
+        user = messages[-1].get("content", "")
+        text = user.split("\n\n", 1)[1] if "\n\n" in user else user
+        content = BR_RE.sub(" ", text)
+        usage = {
+            "prompt_tokens": len(prompt) // 4 + 1,
+            "completion_tokens": len(content) // 4 + 1,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not payload.get("stream"):
+            self.generate(usage["completion_tokens"])
+            data = {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}], "usage": usage}
+            self.send(request, 200, json.dumps(data, ensure_ascii=False).encode('utf-8'), "application/json")
+            return
+
+        request.send_response(200)
+        request.send_header("Content-Type", "text/event-stream")
+        request.send_header("Transfer-Encoding", "chunked")
+        request.end_headers()
+        size = self.stream_chunk_chars
+        for start in range(0, len(content), size):
+            piece = content[start:start + size]
+            self.generate(len(piece) // 4 + 1)
+            self.write_event(request, {"choices": [{"index": 0, "delta": {"content": piece}}]})
+        self.write_event(request, {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+        self.write_chunk(request, b"data: [DONE]\n\n")
+        request.wfile.write(b"0\r\n\r\n")
+
+    def generate(self, tokens):
+        if self.tokens_per_second > 0:
+            time.sleep(tokens / self.tokens_per_second)
+
+    def write_event(self, request, event):
+        self.write_chunk(request, f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode('utf-8'))
+
+    def write_chunk(self, request, data):
+        request.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        request.wfile.flush()
+
+
+def use_fake_google(url):
+    """deep_translator의 GoogleTranslator가 가짜 서버로 요청하도록 기본 주소 교체 (번역기 생성 전에 호출)"""
+    from deep_translator import constants
+
+    constants.BASE_URLS["GOOGLE_TRANSLATE"] = url
@@ -0,0 +1,284 @@
+"""
+PDF to Markdown 캐시 저장소
+- 번역 메모리: (정규화된 줄, 소스 언어, 대상 언어) → 번역 결과 (SQLite)
+- GLM 수정 캐시: (모델, 시스템 프롬프트 해시, 청크 내용) 해시 → 수정 결과 (SQLite)
+- 페이지 체크포인트: (단계, 페이지 내용) 해시 → 단계 출력 (SQLite, 중단된 작업 재개용)
+- 크기 제한 (오래 안 쓴 항목부터 삭제), 적중률 통계
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# 캐시 기본 위치 (사용자 홈 디렉토리)
+TRANSLATION_MEMORY_FILE = Path.home() / ".pdf_to_markdown_tm.sqlite3"
+GLM_CACHE_FILE = Path.home() / ".pdf_to_markdown_glm_cache.sqlite3"
+CHECKPOINT_FILE = Path.home() / ".pdf_to_markdown_checkpoints.sqlite3"
+
+
+def normalize_line(line: str) -> str:
+    """캐시 키용 정규화 (앞뒤 공백 제거, 연속 공백을 하나로)"""
+    return " ".join(line.split())
+
+
+def open_database(path):
+    """여러 스레드에서 공유할 SQLite 연결 (WAL 모드)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class TranslationMemory:
+    """SQLite 번역 메모리 (여러 스레드에서 공유 가능)"""
+
+    def __init__(self, path=TRANSLATION_MEMORY_FILE, max_entries: int = 200_000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = open_database(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tm ("
+            " source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, source_text TEXT NOT NULL,"
+            " translated TEXT NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (source_lang, target_lang, source_text))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tm_last_used ON tm (last_used)")
+        self.conn.commit()
+
+    def get_many(self, source_lang, target_lang, lines) -> dict:
+        """여러 줄 조회, {정규화된 줄: 번역} 반환 (적중한 항목만)"""
+        keys = list(dict.fromkeys(normalize_line(line) for line in lines))
+        found = {}
+        with self.lock:
+            # SQLite 변수 개수 제한 때문에 나눠서 조회
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT source_text, translated FROM tm WHERE source_lang = ? AND target_lang = ?"
+                    f" AND source_text IN ({','.join('?' * len(part))})",
+                    [source_lang, target_lang, *part],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE tm SET last_used = ? WHERE source_lang = ? AND target_lang = ? AND source_text = ?",
+                    [(now, source_lang, target_lang, key) for key in found],
+                )
+                self.conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, source_lang, target_lang, pairs):
+        """(원문, 번역) 목록 저장 후 크기 제한 적용"""
+        now = time.time()
+        rows = [(source_lang, target_lang, normalize_line(src), dst, now) for src, dst in pairs if src.strip()]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO tm VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """항목 수가 제한을 넘으면 오래 안 쓴 항목부터 제한의 90%까지 삭제"""
+        count = self.conn.execute("SELECT COUNT(*) FROM tm").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * 0.9)
+        self.conn.execute(
+            "DELETE FROM tm WHERE rowid IN (SELECT rowid FROM tm ORDER BY last_used LIMIT ?)", (excess,)
+        )
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM tm").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class GLMFixCache:
+    """GLM 수정 결과 캐시 - 같은 모델/프롬프트/청크면 API 호출 없이 재사용"""
+
+    def __init__(self, path=GLM_CACHE_FILE, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.saved_chars = 0
+        self.lock = threading.Lock()
+        self.conn = open_database(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS glm ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, output TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS glm_last_used ON glm (last_used)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM glm").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, text: str) -> str:
+        prompt_hash = hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()
+        digest = hashlib.sha256()
+        for part in (model, prompt_hash, text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, model, system_prompt, text):
+        """캐시된 수정 결과 (없으면 None)"""
+        key = self.make_key(model, system_prompt, text)
+        with self.lock:
+            row = self.conn.execute("SELECT output FROM glm WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE glm SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.hits += 1
+            self.saved_chars += len(text)
+            return row[0]
+
+    def put(self, model, system_prompt, text, output):
+        key = self.make_key(model, system_prompt, text)
+        size = len(output.encode('utf-8'))
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM glm WHERE key = ?", (key,)).fetchone()
+            self.conn.execute("INSERT OR REPLACE INTO glm VALUES (?, ?, ?, ?, ?)",
+                              (key, model, output, size, time.time()))
+            self.total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """전체 크기가 제한을 넘으면 오래 안 쓴 항목부터 제한의 90%까지 삭제"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = self.conn.execute("SELECT key, size FROM glm ORDER BY last_used").fetchall()
+        removed = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            removed.append((key,))
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM glm WHERE key = ?", removed)
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM glm").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_chars": self.saved_chars,
+            }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class CheckpointStore:
+    """페이지 단위 체크포인트 - 단계(변환/번역/수정)별 출력을 입력 내용 해시로 저장
+
+    페이지를 마칠 때마다 바로 기록하므로 중단된 작업을 다시 실행하면 끝난 페이지는 건너뛰고,
+    PDF를 조금 고친 뒤 다시 실행하면 내용이 바뀐 페이지만 다시 처리한다.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE, max_bytes: int = 1024 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = {}
+        self.misses = {}
+        self.lock = threading.Lock()
+        self.conn = open_database(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint ("
+            " key TEXT PRIMARY KEY, stage TEXT NOT NULL, output TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS checkpoint_last_used ON checkpoint (last_used)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM checkpoint").fetchone()[0]
+
+    @staticmethod
+    def make_key(stage: str, parts) -> str:
+        digest = hashlib.sha256()
+        for part in (stage, *parts):
+            digest.update(part.encode('utf-8') if isinstance(part, str) else part)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, stage, parts):
+        """저장된 단계 출력 (없으면 None), parts는 출력을 결정하는 입력들 (문자열 또는 bytes)"""
+        key = self.make_key(stage, parts)
+        with self.lock:
+            row = self.conn.execute("SELECT output FROM checkpoint WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses[stage] = self.misses.get(stage, 0) + 1
+                return None
+            self.conn.execute("UPDATE checkpoint SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.hits[stage] = self.hits.get(stage, 0) + 1
+            return row[0]
+
+    def put(self, stage, parts, output):
+        key = self.make_key(stage, parts)
+        size = len(output.encode('utf-8'))
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM checkpoint WHERE key = ?", (key,)).fetchone()
+            self.conn.execute("INSERT OR REPLACE INTO checkpoint VALUES (?, ?, ?, ?, ?)",
+                              (key, stage, output, size, time.time()))
+            self.total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """전체 크기가 제한을 넘으면 오래 안 쓴 항목부터 제한의 90%까지 삭제"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = self.conn.execute("SELECT key, size FROM checkpoint ORDER BY last_used").fetchall()
+        removed = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            removed.append((key,))
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM checkpoint WHERE key = ?", removed)
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM checkpoint").fetchone()[0]
+            return {
+                "entries": entries,
+                "bytes": self.total_bytes,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
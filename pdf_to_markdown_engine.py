@@ -0,0 +1,2609 @@
+#!/usr/bin/env python3
+"""
+PDF to Markdown 변환 엔진 (GUI 없음)
+- PDF → Markdown 변환, Google 번역, GLM 오류 수정 파이프라인
+- 진행 상황은 이벤트 콜백으로 전달 (GUI는 구독만 함)
+- 명령줄에서 폴더/글롭 단위 일괄 처리 가능
+
+사용법:
+    python pdf_to_markdown_engine.py docs/ -t ko --fix
+    python pdf_to_markdown_engine.py "docs/*.pdf" -o out/ --images --page-chunks -j 8
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import heapq
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from pdf_to_markdown_metrics import GLMMetrics
+from pdf_to_markdown_profile import ProcessProfiler, StageTracer
+from pdf_to_markdown_translate import (
+    GOOGLE_BATCH_CHARS, LIBRETRANSLATE_URL, TRANSLATION_BACKENDS, GlossaryBackend, GoogleBackend,
+    LibreTranslateBackend, is_throttle_error,
+)
+from pdf_to_markdown_cache import (
+    CHECKPOINT_FILE, GLM_CACHE_FILE, TRANSLATION_MEMORY_FILE, CheckpointStore, GLMFixCache, TranslationMemory,
+    normalize_line,
+)
+
+# 설정 파일 경로 (사용자 홈 디렉토리 - Git에 포함되지 않음)
+CONFIG_FILE = Path.home() / ".pdf_to_markdown_config.json"
+
+LANGUAGES = {
+    "번역 안함": None,
+    "한국어": "ko",
+    "영어": "en",
+    "일본어": "ja",
+    "중국어 (간체)": "zh-CN",
+    "중국어 (번체)": "zh-TW",
+}
+
+SOURCE_LANGUAGES = {
+    "자동 감지": "auto",
+    "중국어 (간체)": "zh-CN",
+    "중국어 (번체)": "zh-TW",
+    "영어": "en",
+    "일본어": "ja",
+    "한국어": "ko",
+}
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.md')
+
+GLM_API_URL = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
+
+# 마크다운 이미지 참조 ![alt](path) - pymupdf4llm은 출력 폴더 전체 경로를 그대로 쓰므로 공백이 든 경로도 닫는 괄호까지 받음
+IMAGE_REF_RE = re.compile(r'!\[([^\]]*)\]\(([^)\n]+)\)')
+
+GLM_SYSTEM_PROMPT = """You are a markdown document fixer. Fix formatting errors in the given markdown.
+DO NOT translate - the text is already translated. Only fix formatting issues.
+
+## Fix these errors:
+
+### 1. Fix Broken Tables
+BAD (cells merged with <br>):
+|Parameter<br>Symbol<br>MIN|value<br>value|
+GOOD (proper columns):
+| Parameter | Symbol | MIN |
+|-----------|--------|-----|
+| value | value | value |
+
+### 2. Fix Garbled Characters
+- Replace "z ", "L ", "l ", "ν ", "nn " at line start with "- "
+- Remove random chars like "肯", "电", "N", "KE", "SA" that don't belong
+
+### 3. Remove Page Numbers
+- Delete standalone lines with just numbers like "1", "2", ... "14"
+
+### 4. Clean Empty Tables
+- Remove tables with only empty cells |||||||||
+
+### 5. Fix Table Structure
+- Ensure proper | column | format
+- Add |---|---| separator after header row
+- Split merged cells into separate columns
+
+Return ONLY the fixed markdown. Keep all Korean/translated text as-is."""
+
+
+def load_config():
+    """설정 파일에서 API 키 로드"""
+    if CONFIG_FILE.exists():
+        try:
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            pass
+    return {"api_key": ""}
+
+
+def save_config(config):
+    """설정 파일에 API 키 저장"""
+    try:
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"설정 저장 실패: {e}")
+
+
+def sanitize_filename(name):
+    """파일명에서 특수문자, 한글, 공백 제거"""
+    sanitized = re.sub(r'[^a-zA-Z0-9]', '', name)
+    return sanitized[:20] if sanitized else "pdf"
+
+
+@contextmanager
+def atomic_output(path):
+    """출력 파일을 같은 폴더의 임시 파일에 쓰고, 끝까지 성공하면 os.replace로 교체
+
+    중간에 실패하거나 중단되면 임시 파일만 지우므로 기존 파일(입력 파일과 경로가 같을 때 포함)은 그대로 남는다.
+    """
+    path = Path(path)
+    # 같은 폴더라야 os.replace가 원자적, 이름에 프로세스/스레드를 넣어 동시 실행끼리 겹치지 않게 함
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+# 청크 분할용 패턴
+CJK_RE = re.compile(r'[\u1100-\u11ff\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+PAGE_MARKER_RE = re.compile(r'^<!-- Page \d+ -->$')
+LEADING_BLANK_LINES_RE = re.compile(r'(?:[ \t]*\n)*')
+
+# GLM 청크당 토큰 예산 (출력 max_tokens 8192 안에 수정 결과가 들어가도록 여유를 둠)
+GLM_CHUNK_TOKENS = 3000
+
+
+def estimate_tokens(text: str) -> int:
+    """GLM 토큰 수 추정 (한중일 문자는 글자당 약 1토큰, 나머지는 4글자당 약 1토큰)"""
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def split_markdown_blocks(text: str) -> list:
+    """빈 줄로 구분된 마크다운 블록 목록 [(블록, 나눌 수 있는지, 뒤 구분자)]
+
+    코드 펜스 안의 빈 줄에서는 나누지 않고, 표나 코드 펜스가 든 블록은 나눌 수 없는 블록으로 표시한다.
+    구분자는 블록 끝부터 다음 블록 시작까지의 원문(줄바꿈, 빈 줄, 공백만 있는 줄)이라
+    블록과 구분자를 차례로 이으면 입력과 같다 (첫 블록 앞의 빈 줄은 첫 블록에 포함).
+    """
+    blocks = []
+    start = None  # 현재 블록 시작 위치 (문자 오프셋)
+    end = 0  # 현재 블록 마지막 줄의 끝 위치
+    pending = None  # 구분자 끝(다음 블록 시작)을 기다리는 블록 (시작, 끝, 나눌 수 있는지)
+    atomic = False
+    fence = None
+    pos = 0
+
+    for line in text.split('\n'):
+        line_start = pos
+        pos += len(line) + 1
+        stripped = line.strip()
+        if fence is None and not stripped:
+            if start is not None:
+                pending = (start, end, not atomic)
+                start, atomic = None, False
+            continue
+        if start is None:
+            if pending is not None:
+                blocks.append((text[pending[0]:pending[1]], pending[2], text[pending[1]:line_start]))
+                pending = None
+            start = line_start if blocks else 0
+        end = line_start + len(line)
+        if fence is not None:
+            if stripped.startswith(fence) and not stripped.lstrip(fence[0]):
+                fence = None
+            continue
+        match = FENCE_RE.match(line)
+        if match:
+            fence = match.group(1)
+            atomic = True
+        elif stripped.startswith('|'):
+            atomic = True
+
+    if start is not None:
+        pending = (start, end, not atomic)
+    if pending is not None:
+        blocks.append((text[pending[0]:pending[1]], pending[2], text[pending[1]:]))
+    return blocks
+
+
+def split_markdown_into_chunks(text: str, max_tokens: int = GLM_CHUNK_TOKENS, separators: bool = False) -> list:
+    """마크다운을 토큰 예산 안의 청크로 분할 (표와 코드 펜스는 자르지 않음, 입력 크기에 선형)
+
+    블록을 순서대로 채우다 예산을 넘으면 새 청크를 시작하고, 예산의 절반을 넘긴 청크는 페이지 구분선에서 끊는다.
+    예산보다 큰 표/코드 펜스는 통째로 한 청크가 되고, 예산보다 큰 일반 문단만 줄 단위로 나눈다.
+    separators=True면 [(청크, 뒤 구분자)]를 반환한다. 구분자는 원문의 청크 사이 텍스트(빈 줄 묶음, 문단 안에서
+    끊었으면 줄바꿈 하나) 그대로라서 "".join(청크 + 구분자)가 입력과 같다.
+    """
+    chunks = []
+    parts = []
+    used = 0
+    gap = ""  # 마지막으로 넣은 조각 뒤의 원문 구분자
+
+    def flush():
+        nonlocal parts, used
+        if parts:
+            chunks.append((''.join(parts), gap))
+            parts, used = [], 0
+
+    for block, splittable, block_gap in split_markdown_blocks(text):
+        tokens = estimate_tokens(block)
+        if splittable and tokens > max_tokens:
+            lines = block.split('\n')
+            pieces = [(line, estimate_tokens(line) + 1, '\n') for line in lines[:-1]]
+            pieces.append((lines[-1], estimate_tokens(lines[-1]) + 1, block_gap))
+        else:
+            pieces = [(block, tokens, block_gap)]
+
+        for piece, piece_tokens, piece_gap in pieces:
+            if parts and used + piece_tokens > max_tokens:
+                flush()
+            if parts:
+                parts.append(gap)
+            parts.append(piece)
+            used += piece_tokens
+            gap = piece_gap
+
+        last_line = block[block.rfind('\n') + 1:].strip()
+        if PAGE_MARKER_RE.match(last_line) and used >= max_tokens // 2:
+            flush()
+
+    flush()
+    if not chunks:
+        chunks = [(text, "")]
+    return chunks if separators else [chunk for chunk, _ in chunks]
+
+
+# GLM_SYSTEM_PROMPT가 고치는 결함 패턴 (로컬 사전 검사용)
+BR_CELL_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+BULLET_ARTIFACT_RE = re.compile(r'^(z|L|l|ν|nn) [^\W\d_]')  # 잔재 뒤에 글자(한중일 포함)가 올 때만 ("L = 10 mm" 제외)
+BULLET_AMBIGUOUS = ("L", "l")  # "l love ..." 같은 실제 문장일 수 있어 로컬에서는 고치지 않고 GLM에 맡김
+BULLET_ARTIFACT_CHARS = "zLlνn"
+PAGE_NUMBER_RE = re.compile(r'^\d{1,4}$')
+EMPTY_TABLE_ROW_RE = re.compile(r'^\|[\s|]*\|$')
+TABLE_CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')  # 이스케이프되지 않은 셀 구분자
+TABLE_SEPARATOR_RE = re.compile(r'^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$')  # GFM: 셀마다 '-' 하나 이상
+
+
+def table_columns(row: str) -> int:
+    """표 행의 열 수 (셀 안의 이스케이프된 \\|는 구분자로 세지 않음)"""
+    stripped = row.strip()
+    if stripped.startswith('|'):
+        stripped = stripped[1:]
+    if stripped.endswith('|') and not stripped.endswith('\\|'):
+        stripped = stripped[:-1]
+    return len(TABLE_CELL_SPLIT_RE.findall(stripped)) + 1
+
+
+def table_defects(rows) -> set:
+    """표 블록 하나의 결함 종류 (<br> 셀, 빈 행, 헤더 구분선 없음, 열 수 불일치)"""
+    found = set()
+    if len(rows) < 2 or not TABLE_SEPARATOR_RE.match(rows[1].strip()):
+        found.add("missing_separator")
+    columns = None
+    for row in rows:
+        stripped = row.strip()
+        if BR_CELL_RE.search(stripped):
+            found.add("br_cells")
+        if EMPTY_TABLE_ROW_RE.match(stripped):
+            found.add("empty_table")
+        count = table_columns(stripped)
+        if columns is not None and count != columns:
+            found.add("column_mismatch")
+        columns = count
+    return found
+
+
+def find_defect_spans(text: str) -> list:
+    """결함이 있는 줄 구간 목록 [(시작 줄, 끝 줄(미포함), 결함 종류 목록)]
+
+    줄을 한 번 훑으며 결함이 있는 표는 표 전체를, 줄 앞 "z "/"L "/"ν " 같은 글머리 잔재와
+    번호만 있는 줄은 그 줄만 구간으로 잡는다. 코드 펜스 안은 검사하지 않는다.
+    """
+    lines = text.split('\n')
+    spans = []
+    in_fence = False
+    table_start = None
+
+    for i, line in enumerate(lines + [""]):
+        stripped = line.strip()
+        if not in_fence and stripped.startswith('|'):
+            if table_start is None:
+                table_start = i
+            continue
+        if table_start is not None:
+            kinds = table_defects(lines[table_start:i])
+            if kinds:
+                spans.append((table_start, i, sorted(kinds)))
+            table_start = None
+        if stripped[:1] in "`~" and FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif in_fence or not stripped:
+            continue
+        elif stripped[0] in BULLET_ARTIFACT_CHARS and BULLET_ARTIFACT_RE.match(stripped):
+            spans.append((i, i + 1, ["bullet_artifact"]))
+        elif stripped[0].isdigit() and PAGE_NUMBER_RE.match(stripped):
+            spans.append((i, i + 1, ["page_number"]))
+    return spans
+
+
+def find_markdown_defects(text: str) -> list:
+    """GLM 수정이 필요한 결함 종류 목록 (없으면 빈 목록 → GLM 호출 불필요)"""
+    return sorted({kind for _, _, kinds in find_defect_spans(text) for kind in kinds})
+
+
+def merge_spans(spans, gap: int = 2) -> list:
+    """가까운 구간(사이 줄 수 gap 이하)을 합쳐 요청 수를 줄임 [(시작 줄, 끝 줄)]"""
+    merged = []
+    for start, end, _ in spans:
+        if merged and start - merged[-1][1] <= gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def unwrap_code_block(output: str, original: str) -> str:
+    """모델이 결과를 ```markdown 블록으로 감싸 보냈으면 벗겨냄 (원문이 코드 블록이면 그대로)"""
+    stripped = output.strip('\n')
+    if stripped.startswith("```") and not original.lstrip().startswith("```") and stripped.endswith("```"):
+        inner = stripped.split('\n')[1:-1]
+        return '\n'.join(inner)
+    return stripped
+
+
+def repair_table(rows, counts) -> list:
+    """표 블록 하나를 규칙대로 수정 (빈 표는 삭제, 두 행 이상이고 열 수가 맞는 표에만 헤더 구분선 추가)"""
+    if all(EMPTY_TABLE_ROW_RE.match(row.strip()) or TABLE_SEPARATOR_RE.match(row.strip()) for row in rows):
+        counts["empty_tables"] += 1
+        return []
+    if len(rows) < 2 or TABLE_SEPARATOR_RE.match(rows[1].strip()):
+        return rows  # '|'로 시작하는 줄 하나는 표로 보지 않음
+    if any(BR_CELL_RE.search(row) for row in rows):
+        return rows  # <br>로 합쳐진 셀은 행을 나눠야 하므로 GLM에 맡김
+    columns = {table_columns(row) for row in rows}
+    if len(columns) != 1:
+        return rows  # 열 수가 다른 표는 판단이 필요하므로 GLM에 맡김
+    counts["separators"] += 1
+    return [rows[0], "|" + "---|" * columns.pop(), *rows[1:]]
+
+
+def repair_markdown(text: str):
+    """GLM 없이 기계적으로 고칠 수 있는 결함을 규칙으로 수정, (수정된 텍스트, 항목별 수정 횟수) 반환
+
+    번호만 있는 줄과 빈 표를 지우고, 열 수가 맞는 표에 헤더 구분선을 넣고, 줄 앞 "z "/"L "/"ν " 등을 "- "로 바꾼다.
+    줄을 지워서 앞뒤 빈 줄 묶음이 이어지면 둘 중 긴 쪽만 남긴다 (원래 있던 빈 줄 묶음은 그대로).
+    코드 펜스 안은 건드리지 않으며 줄을 한 번만 훑는다.
+    """
+    counts = {"page_numbers": 0, "empty_tables": 0, "separators": 0, "bullets": 0}
+    out = []
+    table = []
+    in_fence = False
+    blank_run = 0  # out 끝의 연속 빈 줄 수
+    gap = None  # 마지막으로 지운 줄 앞의 빈 줄 수 (지운 뒤의 빈 줄은 이 수를 넘는 만큼만 남김)
+    gap_seen = 0
+
+    def keep(line):
+        nonlocal blank_run, gap, gap_seen
+        if not in_fence and not line.strip():
+            if gap is not None:
+                gap_seen += 1
+                if gap_seen <= gap:
+                    return
+            blank_run += 1
+        else:
+            blank_run, gap = 0, None
+        out.append(line)
+
+    def removed():
+        nonlocal gap, gap_seen
+        # 문서 맨 앞에서 지웠으면 뒤따르는 빈 줄도 모두 버림
+        gap, gap_seen = (blank_run if out else len(text)), 0
+
+    def flush_table():
+        rows = repair_table(table, counts)
+        if not rows:
+            removed()
+        for row in rows:
+            keep(row)
+        table.clear()
+
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not in_fence and stripped.startswith('|'):
+            table.append(line)
+            continue
+        if table:
+            flush_table()
+        if stripped[:1] in "`~" and FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and stripped:
+            # 첫 글자로 먼저 걸러서 대부분의 줄은 정규식 없이 통과
+            if stripped[0].isdigit() and PAGE_NUMBER_RE.match(stripped):
+                counts["page_numbers"] += 1
+                removed()
+                continue
+            match = stripped[0] in BULLET_ARTIFACT_CHARS and BULLET_ARTIFACT_RE.match(stripped)
+            if match and match.group(1) not in BULLET_AMBIGUOUS:
+                indent = line[:len(line) - len(line.lstrip())]
+                line = indent + "- " + stripped.split(' ', 1)[1]
+                counts["bullets"] += 1
+        keep(line)
+    if table:
+        flush_table()
+    return '\n'.join(out), counts
+
+
+class GLMClient:
+    """GLM API 공유 클라이언트 - 연결 풀 + keep-alive (+ 선택적 HTTP/2)
+
+    모든 작업 스레드가 같은 인스턴스를 쓰면 TCP/TLS 연결을 재사용한다.
+    새 연결 수는 httpcore trace 이벤트로 세므로 stats()로 재사용 여부를 확인할 수 있다.
+    """
+
+    def __init__(self, api_key, max_connections=8, max_keepalive=None, keepalive_expiry=60.0,
+                 http2=False, timeout=120.0, url=GLM_API_URL):
+        import httpx
+
+        if http2:
+            try:
+                import h2  # noqa: F401 - httpx HTTP/2 지원에 필요
+            except ImportError:
+                http2 = False  # pip install httpx[http2] 필요, HTTP/1.1로 대체
+
+        self.url = url
+        self.http2 = http2
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.client = httpx.Client(
+            timeout=timeout,
+            http2=http2,
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive if max_keepalive is not None else max_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with self.lock:
+                self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self.lock:
+                self.tls_handshakes += 1
+
+    def post(self, payload):
+        """채팅 완성 요청 (httpx.Response 반환)"""
+        with self.lock:
+            self.requests += 1
+        return self.client.post(self.url, json=payload, extensions={"trace": self._trace})
+
+    def stream(self, payload, info=None):
+        """SSE 스트리밍 요청, 도착하는 대로 내용 조각(delta 문자열)을 내보내는 생성기
+
+        429/5xx는 본문을 읽기 전에 예외로 올려서 호출 측이 재시도하게 한다.
+        info(dict)를 넘기면 받은 바이트 수("bytes")와 마지막 이벤트의 usage("usage")를 채운다.
+        """
+        info = {} if info is None else info
+        info["bytes"] = 0
+        with self.lock:
+            self.requests += 1
+        with self.client.stream("POST", self.url, json=dict(payload, stream=True),
+                                extensions={"trace": self._trace}) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                info["bytes"] += len(line.encode('utf-8')) + 1
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("usage"):
+                    info["usage"] = event["usage"]
+                choices = event.get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    yield delta
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused": max(0, self.requests - self.new_connections),
+                "tls_handshakes": self.tls_handshakes,
+                "http2": self.http2,
+            }
+
+    def close(self):
+        self.client.close()
+
+
+def build_glm_payload(text: str) -> dict:
+    """glm-4-flash 채팅 완성 요청 본문"""
+    return {
+        "model": "glm-4-flash",  # 더 빠른 모델
+        "messages": [
+            {"role": "system", "content": GLM_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Fix this markdown (do not translate):\n\n{text}"}
+        ],
+        "max_tokens": 8192,
+        "temperature": 0.1,
+    }
+
+
+def glm_usage_tokens(usage, text: str, content: str):
+    """응답의 usage에서 (입력 토큰, 출력 토큰), usage가 없으면 로컬 추정치"""
+    if usage and "prompt_tokens" in usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return estimate_tokens(GLM_SYSTEM_PROMPT) + estimate_tokens(text), estimate_tokens(content)
+
+
+def fix_chunk_with_glm(text: str, api_key: str, chunk_num: int, total_chunks: int, cache=None, client=None,
+                       stream=False, on_bytes=None, metrics=None, document=None, lookup=True) -> str:
+    """단일 청크 GLM 처리 (동기, cache가 있으면 같은 청크는 API 호출 없이 재사용)
+
+    lookup=False면 캐시는 조회하지 않고 결과 저장에만 쓴다 (호출 측이 이미 조회한 경우).
+
+    client(GLMClient)를 넘기면 공유 연결 풀을 쓰고, 없으면 요청마다 새 연결을 연다.
+    stream이면 공유 클라이언트로 SSE 응답을 받아 조각을 이어 붙인다.
+    on_bytes(n)는 수정 결과를 n바이트 받을 때마다 호출된다 (스트리밍이면 조각마다, 아니면 응답 끝에 한 번).
+    스트림이 중간에 실패하면 그 시도에서 받은 만큼 음수로 되돌려, 성공한 시도의 바이트만 남는다.
+    metrics(GLMMetrics)가 있으면 시도마다 토큰/지연/바이트를 document 이름으로 기록한다.
+    """
+    import httpx
+
+    if cache is not None and lookup:
+        cached = cache.get("glm-4-flash", GLM_SYSTEM_PROMPT, text)
+        if cached is not None:
+            if metrics is not None:
+                metrics.record_cache_hit(document)
+            if on_bytes is not None:
+                on_bytes(len(cached.encode('utf-8')))
+            return cached
+
+    payload = build_glm_payload(text)
+    bytes_sent = len(json.dumps(payload, ensure_ascii=False).encode('utf-8')) if metrics is not None else 0
+    started = time.perf_counter()
+    usage = None
+
+    streamed = 0  # 이번 시도에서 on_bytes로 알린 바이트 (실패하면 되돌림)
+
+    # 429/5xx는 예외로 올려서 호출 측(스케줄러)이 재시도하게 함
+    try:
+        if client is not None and stream:
+            info = {}
+            parts = []
+            for delta in client.stream(payload, info=info):
+                parts.append(delta)
+                if on_bytes is not None:
+                    size = len(delta.encode('utf-8'))
+                    streamed += size
+                    on_bytes(size)
+            content = "".join(parts)
+            usage = info.get("usage")
+            bytes_received = info.get("bytes", 0)
+        else:
+            if client is not None:
+                response = client.post(payload)
+                response.raise_for_status()
+                data = response.json()
+            else:
+                headers = {
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                }
+                with httpx.Client(timeout=120.0) as one_shot:
+                    response = one_shot.post(GLM_API_URL, headers=headers, json=payload)
+                    response.raise_for_status()
+                    data = response.json()
+            content = data["choices"][0]["message"]["content"] if data.get("choices") else ""
+            usage = data.get("usage")
+            bytes_received = len(response.content)
+            if content and on_bytes is not None:
+                on_bytes(len(content.encode('utf-8')))
+    except Exception:
+        if streamed:
+            on_bytes(-streamed)
+        if metrics is not None:
+            metrics.record_call(document, "glm-4-flash", latency=time.perf_counter() - started,
+                                bytes_sent=bytes_sent, error=True)
+        raise
+
+    if metrics is not None:
+        prompt_tokens, completion_tokens = glm_usage_tokens(usage, text, content)
+        metrics.record_call(document, "glm-4-flash", prompt_tokens, completion_tokens,
+                            latency=time.perf_counter() - started, bytes_sent=bytes_sent,
+                            bytes_received=bytes_received)
+    if not content:
+        return text
+    if cache is not None:
+        cache.put("glm-4-flash", GLM_SYSTEM_PROMPT, text, content)
+    return content
+
+
+async def fix_chunk_with_glm_async(text: str, client, cache=None, retries=3, backoff=1.0,
+                                   metrics=None, document=None, url=GLM_API_URL) -> str:
+    """단일 청크 GLM 처리 (비동기, client는 인증 헤더가 설정된 httpx.AsyncClient)
+
+    429/5xx/타임아웃은 지터가 섞인 지수 백오프로 재시도하고, 최종 실패 시 예외를 올린다.
+    """
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, "glm-4-flash", GLM_SYSTEM_PROMPT, text)
+        if cached is not None:
+            if metrics is not None:
+                metrics.record_cache_hit(document)
+            return cached
+
+    payload = build_glm_payload(text)
+    bytes_sent = len(json.dumps(payload, ensure_ascii=False).encode('utf-8')) if metrics is not None else 0
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, json=payload)
+            response.raise_for_status()
+            data = response.json()
+            break
+        except Exception as e:
+            if metrics is not None:
+                metrics.record_call(document, "glm-4-flash", latency=time.perf_counter() - started,
+                                    bytes_sent=bytes_sent, error=True)
+            if attempt >= retries or not is_retryable_error(e):
+                raise
+            if metrics is not None:
+                metrics.record_retries(document, 1)
+            await asyncio.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    content = data["choices"][0]["message"]["content"] if data.get("choices") else ""
+    if metrics is not None:
+        prompt_tokens, completion_tokens = glm_usage_tokens(data.get("usage"), text, content)
+        metrics.record_call(document, "glm-4-flash", prompt_tokens, completion_tokens,
+                            latency=time.perf_counter() - started, bytes_sent=bytes_sent,
+                            bytes_received=len(response.content))
+    if content:
+        if cache is not None:
+            await asyncio.to_thread(cache.put, "glm-4-flash", GLM_SYSTEM_PROMPT, text, content)
+        return content
+    return text
+
+
+class AsyncGLMRunner:
+    """백그라운드 이벤트 루프 하나에서 여러 문서의 GLM 청크를 처리
+
+    httpx.AsyncClient 하나와 세마포어로 전체 동시 요청 수를 제한한다.
+    작업 스레드(동기 코드)는 fix_chunks()로 청크 목록을 넘기고 결과를 기다린다.
+    """
+
+    def __init__(self, api_key, concurrency=64, retries=3, timeout=120.0, http2=False, cache=None, metrics=None,
+                 url=GLM_API_URL):
+        self.api_key = api_key
+        self.url = url
+        self.metrics = metrics
+        self.concurrency = concurrency
+        self.retries = retries
+        self.timeout = timeout
+        self.http2 = http2
+        self.cache = cache
+        self.requests = 0
+        self.new_connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="glm-async", daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._setup(), self.loop).result()
+
+    async def _setup(self):
+        import httpx
+
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                self.http2 = False
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            http2=self.http2,
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            event_hooks={"request": [self._on_request]},
+        )
+
+    async def _on_request(self, request):
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+
+    async def _fix_one(self, text, document):
+        async with self.semaphore:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                return await fix_chunk_with_glm_async(text, self.client, cache=self.cache, retries=self.retries,
+                                                      metrics=self.metrics, document=document, url=self.url)
+            finally:
+                self.in_flight -= 1
+
+    async def _fix_many(self, chunks, document):
+        return await asyncio.gather(*(self._fix_one(chunk, document) for chunk in chunks), return_exceptions=True)
+
+    def fix_chunks(self, chunks, document=None) -> list:
+        """청크 목록 처리 (스레드 안전, 입력 순서대로 결과 또는 예외 반환, 지표는 document 이름으로 기록)"""
+        return asyncio.run_coroutine_threadsafe(self._fix_many(list(chunks), document), self.loop).result()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused": max(0, self.requests - self.new_connections),
+            "peak_in_flight": self.peak_in_flight,
+            "http2": self.http2,
+        }
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def assemble_pages(page_texts, page_chunks: bool) -> str:
+    """페이지 텍스트를 한 번에 이어 붙임 (page_chunks면 페이지 뒤마다 구분선)"""
+    if page_chunks:
+        return "".join(f"{text}\n\n---\n<!-- Page {i+1} -->\n\n" for i, text in enumerate(page_texts))
+    return "".join(page_texts)
+
+
+def trie_pattern(words) -> str:
+    """문자열 목록을 접두사 트리 모양 정규식으로 변환 (수천 개여도 위치마다 키 길이만큼만 비교, 긴 키 우선)"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ''
+        body = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        if '' in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+def replace_many(text: str, replacements: dict) -> str:
+    """여러 문자열을 정규식 하나로 한 번에 치환 (긴 키 우선)"""
+    replacements = {old: new for old, new in replacements.items() if old and old != new}
+    if not replacements:
+        return text
+    pattern = re.compile(trie_pattern(replacements))
+    return pattern.sub(lambda m: replacements[m.group(0)], text)
+
+
+def get_page_count(pdf_path) -> int:
+    """PDF 페이지 수"""
+    import pymupdf
+    with pymupdf.open(str(pdf_path)) as doc:
+        return doc.page_count
+
+
+def get_page_hashes(pdf_path) -> list:
+    """페이지별 내용 해시 (콘텐츠 스트림, 크기, 이미지 목록 - 페이지를 고치면 바뀜)"""
+    import pymupdf
+    hashes = []
+    with pymupdf.open(str(pdf_path)) as doc:
+        for page in doc:
+            digest = hashlib.sha256(page.read_contents())
+            digest.update(repr((tuple(page.rect), page.rotation, page.get_images())).encode('utf-8'))
+            hashes.append(digest.hexdigest())
+    return hashes
+
+
+def identify_headers(pdf_path):
+    """문서 전체 글꼴 크기로 제목 수준표(IdentifyHeaders)를 한 번 만듦 (없는 pymupdf4llm 버전이면 None)
+
+    to_markdown은 hdr_info가 없으면 pages로 범위를 줘도 호출마다 문서 전체를 훑어 표를 다시 만들므로,
+    구간을 나눠 변환할 때는 이 표를 만들어 모든 구간에 넘긴다 (피클 가능한 작은 객체라 프로세스 풀에도 전달).
+    """
+    try:
+        from pymupdf4llm.helpers.pymupdf_rag import IdentifyHeaders
+    except ImportError:
+        try:
+            from pymupdf4llm import IdentifyHeaders
+        except ImportError:
+            return None
+    return IdentifyHeaders(str(pdf_path))
+
+
+def convert_page_range(pdf_path, pages, write_images=False, image_path=None, hdr_info=None) -> list:
+    """페이지 범위를 Markdown으로 변환 (프로세스 풀 작업 함수, 페이지별 텍스트 목록 반환)
+
+    이미지 파일명은 pymupdf4llm이 페이지 번호로 만들기 때문에 구간을 나눠도 순차 실행과 같다.
+    hdr_info(identify_headers 결과)를 주면 구간마다 문서 전체를 다시 훑지 않는다.
+    """
+    import pymupdf4llm
+    extra = {"hdr_info": hdr_info} if hdr_info is not None else {}
+    chunks = pymupdf4llm.to_markdown(str(pdf_path), pages=list(pages), page_chunks=True,
+                                     write_images=write_images, image_path=image_path, **extra)
+    return [chunk.get('text', '') if isinstance(chunk, dict) else str(chunk) for chunk in chunks]
+
+
+def plan_page_shards(page_count: int, processes: int, pages_per_shard: int = 0) -> list:
+    """페이지를 연속 구간으로 분할 (기본: 프로세스당 약 4개 구간)"""
+    if pages_per_shard <= 0:
+        pages_per_shard = max(1, -(-page_count // (max(1, processes) * 4)))
+    return [range(start, min(start + pages_per_shard, page_count))
+            for start in range(0, page_count, pages_per_shard)]
+
+
+WORD_RE = re.compile(r'[^\W\d_]+')
+
+
+def is_table_row(stripped: str) -> bool:
+    """'|'로 시작하고 끝나는 표 행인지 (앞뒤 공백을 제거한 줄)"""
+    return len(stripped) > 1 and stripped[0] == '|' and stripped[-1] == '|'
+
+
+def split_table_row(line: str) -> list:
+    """표 행을 '|' 기준으로 나눔 (첫/마지막 항목은 바깥 공백, 이스케이프된 \\|는 나누지 않음)
+
+    '|'.join(결과)는 원래 줄과 같다.
+    """
+    return TABLE_CELL_SPLIT_RE.split(line)
+
+
+def is_translatable_cell(cell: str) -> bool:
+    """번역할 글이 있는 셀인지 (숫자, 단위, 기호, 대문자 약어만 있는 셀은 제외)"""
+    if CJK_RE.search(cell):
+        return True
+    return any(len(word) >= 3 and not word.isupper() for word in WORD_RE.findall(cell))
+
+
+def replace_cell_text(cell: str, text: str) -> str:
+    """셀 앞뒤 여백은 그대로 두고 내용만 교체 (번역문의 '|'는 이스케이프해 열 구조 유지)"""
+    stripped = cell.strip()
+    if not stripped:
+        return cell
+    start = cell.index(stripped)
+    return cell[:start] + TABLE_CELL_SPLIT_RE.sub(r'\\|', text) + cell[start + len(stripped):]
+
+
+# 번역하지 않을 인라인 구간 (앞에 있는 패턴 우선): 인라인 코드, 이미지, 링크 주소, URL, 수식, HTML 주석/태그,
+# 레지스터/매크로 이름(밑줄이 든 대문자 식별자), 16진수
+INLINE_MASK_RE = re.compile('|'.join((
+    r'(`+).+?\1',
+    r'!\[[^\]\n]*\]\([^)\n]*\)',
+    r'(?<=\])\([^)\s]*(?:\s+"[^"\n]*")?\)',
+    r'<(?:https?|ftp|mailto):[^>\s]+>',
+    r'\b(?:https?|ftp)://[^\s<>()\[\]]+',
+    r'\$\$.+?\$\$',
+    r'\$(?=\S)[^$\n]+?(?<=\S)\$(?!\d)',
+    r'\\\(.+?\\\)',
+    r'<!--.*?-->',
+    r'</?[A-Za-z][\w-]*(?:\s[^<>\n]*)?/?>',
+    r'\b[A-Z][A-Z0-9]*(?:_[A-Z0-9]+)+\b',
+    r'\b0[xX][0-9A-Fa-f]+\b',
+)))
+MASK_PLACEHOLDER_RE = re.compile(r'\{\{\s*(\d+)\s*\}\}')
+
+
+def mask_inline(text: str):
+    """번역하면 안 되는 인라인 구간을 {{N}} 자리표시자로 바꿈, (가린 텍스트, 원래 구간 목록) 반환"""
+    if '{{' in text:
+        return text, []  # 자리표시자와 헷갈리는 원문은 가리지 않음
+    originals = []
+
+    def hide(match):
+        originals.append(match.group(0))
+        return f"{{{{{len(originals) - 1}}}}}"
+
+    return INLINE_MASK_RE.sub(hide, text), originals
+
+
+def unmask_inline(text: str, originals: list):
+    """자리표시자를 원래 구간으로 복원 (번역 중에 자리표시자가 빠지거나 중복되면 None)"""
+    found = [int(n) for n in MASK_PLACEHOLDER_RE.findall(text)]
+    if sorted(found) != list(range(len(originals))):
+        return None
+    return MASK_PLACEHOLDER_RE.sub(lambda m: originals[int(m.group(1))], text)
+
+
+def has_words(text: str) -> bool:
+    """번역할 글자(문자, 한중일 문자)가 남아 있는지"""
+    return bool(WORD_RE.search(text) or CJK_RE.search(text))
+
+
+def protected_lines(lines) -> list:
+    """줄마다 통째로 번역하지 않을 줄인지 (코드 펜스, $$ 수식 블록, 여러 줄 HTML 주석 - 여닫는 줄 포함)"""
+    protected = [False] * len(lines)
+    fence = None  # 열린 코드 펜스 문자열
+    block = None  # 열린 블록의 닫는 표시 ("$$" 또는 "-->")
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if fence is not None:
+            protected[i] = True
+            if stripped.startswith(fence) and not stripped.lstrip(fence[0]):
+                fence = None
+            continue
+        if block is not None:
+            protected[i] = True
+            if block in stripped:
+                block = None
+            continue
+        if stripped[:1] in "`~":
+            match = FENCE_RE.match(line)
+            if match:
+                protected[i] = True
+                fence = match.group(1)
+        elif stripped == "$$":
+            protected[i] = True
+            block = "$$"
+        elif stripped.startswith("<!--") and "-->" not in stripped:
+            protected[i] = True
+            block = "-->"
+    return protected
+
+
+SENTENCE_RE = re.compile(r'.+?(?:[.!?;:]+(?=\s|$)|[。！？；]+|$)\s*', re.DOTALL)
+
+
+@dataclass(frozen=True)
+class TextPart:
+    """너무 긴 번역 단위를 나눈 조각의 위치 (slot: 원래 단위 위치, index: 조각 순서)"""
+    slot: object
+    index: int
+
+
+def split_long_text(text: str, limit: int) -> list:
+    """limit자를 넘는 텍스트를 문장 경계에서 나눔 (문장 하나가 너무 길면 공백, 공백도 없으면 글자 수로 자름)"""
+    pieces = []
+    current = ""
+    for sentence in SENTENCE_RE.findall(text):
+        while len(sentence) > limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            cut = sentence.rfind(' ', 0, limit)
+            cut = cut + 1 if cut > 0 else limit
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        if current and len(current) + len(sentence) > limit:
+            pieces.append(current)
+            current = ""
+        current += sentence
+    if current:
+        pieces.append(current)
+    return [piece.strip() for piece in pieces if piece.strip()]
+
+
+def batch_item_cost(text: str, position: int) -> int:
+    """배치 안 position번째 항목이 차지하는 문자 수 (번호 마커 <#N#>와 줄바꿈 포함)"""
+    return len(text) + len(str(position)) + 5
+
+
+def pack_translation_batches(units, max_chars: int = GOOGLE_BATCH_CHARS, window: int = 8) -> list:
+    """(위치, 텍스트) 목록을 문자 예산 안의 배치로 묶음 (자르지 않음, 단위 하나는 max_chars 이하여야 함)
+
+    줄 수 제한 없이 최근에 연 배치 window개 중 처음 들어가는 곳에 넣는 first-fit 방식으로,
+    문서 순서를 크게 흐트러뜨리지 않으면서 요청마다 예산을 거의 채운다.
+    """
+    batches = []
+    sizes = []
+    for key, text in units:
+        for b in range(max(0, len(batches) - window), len(batches)):
+            cost = batch_item_cost(text, len(batches[b]))
+            if sizes[b] + cost <= max_chars:
+                batches[b].append((key, text))
+                sizes[b] += cost
+                break
+        else:
+            batches.append([(key, text)])
+            sizes.append(batch_item_cost(text, 0))
+    return batches
+
+
+def is_retryable_error(exc) -> bool:
+    """재시도할 만한 오류인지 (429/5xx, 타임아웃, 연결 끊김)"""
+    if is_throttle_error(exc):
+        return True
+    name = type(exc).__name__
+    return any(key in name for key in ("Timeout", "Connect", "RemoteProtocol", "ReadError", "WriteError"))
+
+
+class SlidingWindowScheduler:
+    """작업 큐 스케줄러 - 배치 단위로 기다리지 않고 항상 limit개 요청을 진행 중으로 유지
+
+    - 재시도: 재시도 가능한 오류는 지터가 섞인 지수 백오프 후 큐에 다시 넣음
+    - 적응형 동시성: 성공이 limit번 쌓이면 +1, 평균 지연(EWMA)이 최소 지연의 4배를 넘으면 -1, 429/5xx면 절반
+    - 지연은 요청 크기(sizes)로 나눠 비교하므로 작은 요청과 큰 요청이 섞여도 큰 요청을 느린 서버로 오인하지 않음
+    """
+
+    def __init__(self, concurrency=4, max_concurrency=16, min_concurrency=1, retries=3, backoff=1.0):
+        self.limit = max(min_concurrency, min(concurrency, max_concurrency))
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.min_latency = None
+        self.avg_latency = None
+        self.successes = 0
+        self.throttled = 0
+        self.retried = 0
+
+    def _on_success(self, latency):
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        self.avg_latency = latency if self.avg_latency is None else self.avg_latency * 0.8 + latency * 0.2
+        if self.avg_latency > self.min_latency * 4 and self.limit > self.min_concurrency:
+            # 지연이 계속 늘면 서버가 밀리는 중 - 한 단계 줄이고 평균을 다시 잼
+            self.limit -= 1
+            self.successes = 0
+            self.avg_latency = None
+            return
+        self.successes += 1
+        if self.successes >= self.limit and self.limit < self.max_concurrency:
+            self.limit += 1
+            self.successes = 0
+
+    def _on_throttle(self):
+        self.throttled += 1
+        self.limit = max(self.min_concurrency, self.limit // 2)
+        self.successes = 0
+
+    def run(self, items, fn, on_result=None, sizes=None) -> list:
+        """fn(item)을 모든 항목에 실행, 입력 순서대로 결과 목록 반환
+
+        최종 실패한 항목은 결과 자리에 예외 객체가 들어간다.
+        on_result(idx, result_or_exc)는 완료될 때마다 호출된다.
+        sizes(항목별 크기, 예: 추정 토큰 수)를 주면 동시성 조절에 크기당 지연을 쓴다.
+        """
+        results = [None] * len(items)
+        ready = [(0.0, idx, 0) for idx in range(len(items))]  # (시작 가능 시각, 인덱스, 시도 횟수) 최소 힙
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while ready or in_flight:
+                now = time.monotonic()
+                while ready and len(in_flight) < self.limit and ready[0][0] <= now:
+                    _, idx, attempt = heapq.heappop(ready)
+                    future = executor.submit(fn, items[idx])
+                    in_flight[future] = (idx, attempt, time.monotonic())
+
+                wait_for = None
+                if ready and len(in_flight) < self.limit:
+                    wait_for = max(0.0, ready[0][0] - now)
+                if not in_flight:
+                    time.sleep(wait_for or 0.0)
+                    continue
+
+                done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, attempt, started = in_flight.pop(future)
+                    try:
+                        results[idx] = future.result()
+                        size = max(1, sizes[idx]) if sizes is not None else 1
+                        self._on_success((time.monotonic() - started) / size)
+                    except Exception as e:
+                        if is_throttle_error(e):
+                            self._on_throttle()
+                        if attempt < self.retries and is_retryable_error(e):
+                            self.retried += 1
+                            delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                            heapq.heappush(ready, (time.monotonic() + delay, idx, attempt + 1))
+                            continue
+                        results[idx] = e
+                    if on_result:
+                        on_result(idx, results[idx])
+        return results
+
+
+class OrderedSink:
+    """완료 순서가 뒤섞인 청크를 번호 순서대로 sink에 씀 (앞 청크가 끝날 때까지 뒤 청크만 잠시 보관)
+
+    청크 사이 구분자는 넣지 않으므로 호출 측이 청크마다 원문 구분자를 붙여서 넣는다.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.pending = {}
+        self.next_index = 0
+        self.lock = threading.Lock()
+
+    def put(self, index, text):
+        with self.lock:
+            self.pending[index] = text
+            while self.next_index in self.pending:
+                self.sink(self.pending.pop(self.next_index))
+                self.next_index += 1
+
+
+def collect_input_files(inputs) -> List[Path]:
+    """파일/폴더/글롭 패턴에서 처리할 PDF/MD 파일 목록 수집 (중복 제거, 순서 유지)"""
+    files = []
+    seen = set()
+
+    def add(path):
+        path = Path(path)
+        if path.suffix.lower() in SUPPORTED_EXTENSIONS and path.is_file():
+            key = path.resolve()
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                add(child)
+        elif path.exists():
+            add(path)
+        else:
+            for match in sorted(glob.glob(item, recursive=True)):
+                add(match)
+    return files
+
+
+@dataclass
+class PipelineOptions:
+    """파이프라인 설정 (GUI 입력값 또는 명령줄 인자에서 생성)"""
+    source_lang: str = "auto"
+    target_lang: Optional[str] = None  # None이면 번역 안함
+    extract_images: bool = False
+    page_chunks: bool = False
+    fix_errors: bool = False
+    api_key: str = ""
+    glm_model: str = "glm-4-flash"  # "glm-4-plus"는 zhipuai 스트리밍 경로
+    output_folder: Optional[str] = None
+    translated_suffix: str = "_translated"
+    line_fallback: bool = False  # 배치 번역 실패 시 줄 단위 재번역
+    translate_table_cells: bool = True  # 표 행은 글이 있는 셀만 번역하고 원래 격자로 다시 조립
+    translate_mask_markup: bool = True  # 코드 블록/인라인 코드/링크 주소/수식/HTML 주석은 번역에 보내지 않음
+    translate_workers: int = 4  # 동시에 보내는 번역 배치 수
+    translate_rate: float = 5.0  # 초기 번역 요청 속도 (회/s, 429/5xx에 따라 자동 조절)
+    translate_batch_chars: int = GOOGLE_BATCH_CHARS  # 번역 요청당 최대 문자 수 (마커 포함, 줄 수 제한 없음)
+    translate_backend: str = "google"  # "google", "glossary"(디스크 용어집, 오프라인), "libretranslate"(자체 호스팅 서버)
+    glossary: Optional[str] = None  # glossary 백엔드 용어집 경로 (TSV 또는 JSON)
+    translate_url: Optional[str] = None  # libretranslate 백엔드 주소 (None이면 LIBRETRANSLATE_URL)
+    translate_api_key: str = ""  # libretranslate 백엔드 API Key (필요한 서버만)
+    translation_memory: Optional[str] = None  # 번역 메모리(SQLite) 경로, None이면 사용 안함
+    translation_memory_max_entries: int = 200_000
+    glm_cache: Optional[str] = None  # GLM 수정 캐시(SQLite) 경로, None이면 사용 안함
+    glm_cache_max_mb: int = 256
+    glm_max_connections: int = 8  # 공유 GLM 클라이언트 연결 풀 크기
+    glm_http2: bool = False  # HTTP/2 사용 (h2 패키지 필요)
+    glm_concurrency: int = 4  # 처음 동시 요청 수 (지연/429에 따라 자동 조절)
+    glm_max_concurrency: int = 8
+    glm_retries: int = 3  # 429/5xx/타임아웃 재시도 횟수
+    glm_timeout: float = 120.0  # 요청당 타임아웃 (초)
+    glm_api_url: str = GLM_API_URL  # 채팅 완성 엔드포인트 (프록시, 로컬 벤치마크 서버 등)
+    glm_chunk_tokens: int = GLM_CHUNK_TOKENS  # GLM 청크당 토큰 예산 (추정치)
+    glm_async: bool = False  # asyncio 경로 (이벤트 루프 하나에서 모든 문서의 청크 처리)
+    glm_async_concurrency: int = 64
+    glm_skip_clean: bool = True  # 로컬 검사에서 결함이 없는 청크는 GLM에 보내지 않음
+    local_repair: bool = True  # GLM 전에 규칙 기반 수정 (번호 줄, 빈 표, 표 구분선, 글머리 잔재)
+    glm_fix_spans: bool = False  # 청크 전체 대신 결함 구간(깨진 표 등)만 보내고 결과를 제자리에 끼워 넣음
+    glm_stream: bool = False  # glm-4-flash 응답을 SSE 스트리밍으로 받음 (진행률이 받은 바이트 기준)
+    trace_memory: bool = False  # 단계 구간마다 tracemalloc 메모리 증가량 기록
+    cprofile: bool = False  # run_batch 동안 모든 스레드의 cProfile 수집
+    streaming: bool = False  # PDF를 페이지 단위로 추출 → 번역 → 수정 → 저장 (단계 겹침)
+    stream_queue_size: int = 4  # 단계 사이 큐에 쌓일 수 있는 최대 페이지 수
+    processes: int = 1  # PDF 변환 프로세스 수 (2 이상이면 페이지 구간 병렬 변환)
+    pages_per_shard: int = 0  # 구간당 페이지 수 (0이면 자동)
+    checkpoint: Optional[str] = None  # 페이지 체크포인트(SQLite) 경로, 설정하면 스트리밍으로 처리하며 재개 가능
+
+
+# 이벤트 콜백: callback(event, data) - event는 "log", "progress", "file_done", "file_error"
+EventCallback = Callable[[str, dict], None]
+
+
+class PipelineEngine:
+    """GUI와 독립된 변환/번역/오류 수정 파이프라인"""
+
+    def __init__(self, options: Optional[PipelineOptions] = None, on_event: Optional[EventCallback] = None):
+        self.options = options or PipelineOptions()
+        self.listeners: List[EventCallback] = []
+        self.source_name = None
+        self.total_tokens_used = 0
+        self.process_pool = None  # run_batch에서 파일 간 공유하는 프로세스 풀
+        self.translation_memory = None
+        self.translation_backend = None
+        self.glm_cache = None
+        self.checkpoints = None
+        self.glm_client = None
+        self.async_glm_runner = None
+        self.metrics = GLMMetrics()  # GLM 호출 지표 (작업 엔진들이 공유, 문서 이름별로 집계)
+        self.tracer = StageTracer(memory=self.options.trace_memory)  # 단계별 시간 구간 (작업 엔진들이 공유)
+        self.profiler = ProcessProfiler() if self.options.cprofile else None
+        self.failures = 0  # 실패해서 원문을 그대로 남긴 번역 줄/GLM 청크 수 (체크포인트 저장 여부 판단)
+        self.open_lock = threading.Lock()
+        if on_event:
+            self.subscribe(on_event)
+
+    def subscribe(self, callback: EventCallback):
+        """이벤트 구독 (콜백은 작업 스레드에서 호출됨)"""
+        self.listeners.append(callback)
+
+    def emit(self, event, **data):
+        if self.source_name:
+            data.setdefault("source", self.source_name)
+        for callback in self.listeners:
+            callback(event, data)
+
+    def log(self, message):
+        self.emit("log", message=message)
+
+    def span(self, name, **args):
+        """단계 구간 측정 (with self.span("translate"): ...), 현재 문서 이름이 함께 기록됨"""
+        return self.tracer.span(name, document=self.source_name, **args)
+
+    def traced(self, name, func, *args, **kwargs):
+        """func(*args, **kwargs)를 구간 하나로 측정해 실행 (스레드 풀 작업용)"""
+        with self.span(name):
+            return func(*args, **kwargs)
+
+    def set_progress(self, percent):
+        self.emit("progress", percent=percent)
+
+    def open_translation_backend(self):
+        """공유 번역 백엔드 (처음 호출 시 생성, run_batch에서는 모든 파일이 공유 - Google 속도 제한도 공유)"""
+        with self.open_lock:
+            if self.translation_backend is None:
+                name = self.options.translate_backend
+                if name == "glossary":
+                    self.translation_backend = GlossaryBackend(self.options.glossary)
+                elif name == "libretranslate":
+                    self.translation_backend = LibreTranslateBackend(
+                        self.options.translate_url or LIBRETRANSLATE_URL,
+                        api_key=self.options.translate_api_key or None,
+                        concurrency=self.options.translate_workers,
+                        rate=self.options.translate_rate,
+                    )
+                else:
+                    self.translation_backend = GoogleBackend(
+                        rate=self.options.translate_rate,
+                        concurrency=self.options.translate_workers,
+                        max_batch_chars=self.options.translate_batch_chars,
+                        split_on_error=self.options.line_fallback,
+                    )
+            return self.translation_backend
+
+    def translation_available(self) -> bool:
+        """선택한 번역 백엔드를 쓸 수 있는지 (필요한 패키지가 없으면 경고를 남기고 False)"""
+        backend = self.open_translation_backend()
+        if backend.is_available():
+            return True
+        self.log(f"경고: {backend.name} 번역 불가 (pip install {backend.requires[1]} 필요), 원본 유지")
+        return False
+
+    def open_translation_memory(self):
+        """번역 메모리 열기 (설정에 경로가 없으면 None)"""
+        if self.translation_memory is None and self.options.translation_memory:
+            self.translation_memory = TranslationMemory(self.options.translation_memory,
+                                                        max_entries=self.options.translation_memory_max_entries)
+        return self.translation_memory
+
+    def open_glm_cache(self):
+        """GLM 수정 캐시 열기 (설정에 경로가 없으면 None)"""
+        if self.glm_cache is None and self.options.glm_cache:
+            self.glm_cache = GLMFixCache(self.options.glm_cache, max_bytes=self.options.glm_cache_max_mb * 1024 * 1024)
+        return self.glm_cache
+
+    def open_checkpoints(self):
+        """페이지 체크포인트 열기 (설정에 경로가 없으면 None)"""
+        if self.checkpoints is None and self.options.checkpoint:
+            self.checkpoints = CheckpointStore(self.options.checkpoint)
+        return self.checkpoints
+
+    def open_glm_client(self):
+        """공유 GLM 클라이언트 (처음 호출 시 생성, run_batch에서는 모든 파일이 공유)"""
+        with self.open_lock:
+            if self.glm_client is None:
+                self.glm_client = GLMClient(
+                    self.options.api_key.strip(),
+                    max_connections=max(self.options.glm_max_connections, self.options.glm_max_concurrency),
+                    http2=self.options.glm_http2,
+                    timeout=self.options.glm_timeout,
+                    url=self.options.glm_api_url,
+                )
+            return self.glm_client
+
+    def open_async_glm_runner(self):
+        """공유 비동기 GLM 실행기 (이벤트 루프 하나, run_batch에서는 모든 파일이 공유)"""
+        with self.open_lock:
+            if self.async_glm_runner is None:
+                self.async_glm_runner = AsyncGLMRunner(
+                    self.options.api_key.strip(),
+                    concurrency=self.options.glm_async_concurrency,
+                    retries=self.options.glm_retries,
+                    timeout=self.options.glm_timeout,
+                    http2=self.options.glm_http2,
+                    cache=self.open_glm_cache(),
+                    metrics=self.metrics,
+                    url=self.options.glm_api_url,
+                )
+            return self.async_glm_runner
+
+    def open_shared_resources(self):
+        """작업 엔진들이 공유할 캐시와 GLM 클라이언트를 미리 열어 둠"""
+        self.open_translation_memory()
+        self.open_glm_cache()
+        self.open_checkpoints()
+        if self.options.target_lang:
+            self.open_translation_backend()
+        if self.options.fix_errors and self.options.api_key.strip() and self.options.glm_model != "glm-4-plus":
+            try:
+                if self.options.glm_async:
+                    self.open_async_glm_runner()
+                else:
+                    self.open_glm_client()
+            except ImportError:
+                self.log("경고: pip install httpx 필요")
+
+    def spawn_worker(self, source_name=None):
+        """같은 설정, 구독자, 공유 자원(프로세스 풀, 캐시, GLM 클라이언트)을 쓰는 작업용 엔진"""
+        worker = PipelineEngine(self.options)
+        worker.listeners = self.listeners
+        worker.source_name = source_name or self.source_name
+        worker.process_pool = self.process_pool
+        worker.translation_memory = self.translation_memory
+        worker.translation_backend = self.translation_backend
+        worker.glm_cache = self.glm_cache
+        worker.checkpoints = self.checkpoints
+        worker.metrics = self.metrics
+        worker.tracer = self.tracer
+        worker.profiler = self.profiler
+        worker.glm_client = self.glm_client
+        worker.async_glm_runner = self.async_glm_runner
+        return worker
+
+    def close(self):
+        """공유 자원 정리 (GLM 클라이언트, 캐시 연결)"""
+        # 비동기 실행기가 캐시를 쓰므로 먼저 닫음
+        for resource in (self.async_glm_runner, self.glm_client, self.translation_backend, self.translation_memory,
+                         self.glm_cache, self.checkpoints):
+            if resource is not None:
+                resource.close()
+        self.async_glm_runner = self.glm_client = self.translation_memory = self.glm_cache = None
+        self.translation_backend = self.checkpoints = None
+
+    def log_glm_cache_stats(self):
+        if self.glm_cache is not None:
+            stats = self.glm_cache.stats()
+            self.emit("glm_cache_stats", **stats)
+            self.log(f"GLM 캐시: 적중 {stats['hits']}회 / 조회 {stats['hits'] + stats['misses']}회 "
+                     f"({stats['hit_rate']:.0%}), {stats['bytes'] / 1024 / 1024:.1f}MB")
+
+    def translate_with_google(self, text, source_lang, target_lang, progress_offset=10, progress_range=40):
+        """번역 백엔드(기본: Google Translate)로 번역 (배치 동시 처리, 백엔드의 문자 예산/동시 처리 수 사용)"""
+        backend = self.open_translation_backend()
+        workers = backend.concurrency or self.options.translate_workers
+        # Google이 아닌 백엔드의 번역은 번역 메모리에서 따로 보관 (용어집 부분 번역이 Google 번역과 섞이지 않게)
+        memory_source = source_lang if backend.name == "google" else f"{source_lang}@{backend.name}"
+
+        lines = text.split('\n')
+        total = len(lines)
+        result = [''] * total
+
+        # 번역할 줄과 스킵할 줄 분류, 표 행은 글이 있는 셀만 번역 단위로 (숫자/단위 셀과 '|'는 보내지 않음)
+        to_translate = []  # (위치, 텍스트) - 위치는 줄 번호 또는 (줄 번호, 셀 번호)
+        rows = {}  # 표 행 줄 번호 → 셀 목록 (번역된 셀을 채운 뒤 다시 조립)
+        table_chars = 0
+        mask = self.options.translate_mask_markup
+        protected = protected_lines(lines) if mask else [False] * total
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if protected[i] or not stripped or stripped.startswith('![') or stripped.startswith('```') or re.match(r'^[\|\-\:\s]+$', stripped):
+                result[i] = line
+            elif self.options.translate_table_cells and is_table_row(stripped):
+                result[i] = line
+                table_chars += len(stripped)
+                cells = split_table_row(line)
+                for c, cell in enumerate(cells):
+                    if is_translatable_cell(cell):
+                        rows[i] = cells
+                        to_translate.append(((i, c), cell.strip()))
+            else:
+                to_translate.append((i, line))
+        if table_chars:
+            cell_chars = sum(len(unit) for slot, unit in to_translate if isinstance(slot, tuple))
+            self.log(f"표 셀 번역: {len(rows)}행, 셀 {cell_chars:,}자만 전송 (표 행 {table_chars:,}자)")
+
+        # 인라인 코드, 링크 주소, 수식, HTML 주석/태그 등은 {{N}}으로 가려서 보내고 번역 후 복원
+        # 가린 뒤 번역할 글자가 없는 단위는 보내지 않음
+        masks = {}  # 위치 → 가린 원래 구간 목록
+        if mask:
+            masked_units = []
+            masked_spans = 0
+            for slot, unit in to_translate:
+                masked, originals = mask_inline(unit)
+                if not has_words(masked):
+                    if not isinstance(slot, tuple):
+                        result[slot] = unit  # 원문 유지 (표 셀은 rows에 원문이 그대로 있음)
+                    continue
+                if originals:
+                    masks[slot] = originals
+                    masked_spans += len(originals)
+                masked_units.append((slot, masked))
+            skipped = sum(protected) + len(to_translate) - len(masked_units)
+            if skipped or masked_spans:
+                self.log(f"번역 제외: 코드/수식 블록 등 {skipped}줄, 인라인 구간 {masked_spans}개 가림")
+            to_translate = masked_units
+        texts = dict(to_translate)
+
+        def place(slot, translated):
+            originals = masks.get(slot)
+            if originals:
+                restored = unmask_inline(translated, originals)
+                if restored is None:
+                    self.failures += 1
+                    restored = unmask_inline(texts[slot], originals)  # 자리표시자가 깨진 번역은 버리고 원문 유지
+                translated = restored
+            if isinstance(slot, tuple):
+                i, c = slot
+                rows[i][c] = replace_cell_text(rows[i][c], translated)
+            else:
+                result[slot] = translated
+
+        # 번역 메모리에 있는 줄은 바로 채우고, 없는 줄로만 배치 구성
+        memory = self.open_translation_memory()
+        if memory and to_translate:
+            cached = memory.get_many(memory_source, target_lang, [line for _, line in to_translate])
+            misses = []
+            for idx, line in to_translate:
+                hit = cached.get(normalize_line(line))
+                if hit is not None:
+                    place(idx, hit)
+                else:
+                    misses.append((idx, line))
+            self.log(f"번역 메모리: {len(to_translate) - len(misses)}/{len(to_translate)}줄 적중")
+            to_translate = misses
+
+        # 문서 안에서 반복되는 줄은 한 번만 번역하고 결과를 모든 위치에 복사
+        duplicates = {}
+        for idx, line in to_translate:
+            duplicates.setdefault(normalize_line(line), []).append(idx)
+        unique_count = len(duplicates)
+        if unique_count < len(to_translate):
+            self.log(f"중복 제거: {len(to_translate)}줄 → {unique_count}줄")
+            to_translate = [(indexes[0], texts[indexes[0]]) for indexes in duplicates.values()]
+
+        # 문자 예산을 채우도록 배치 구성 (자르지 않음), 예산보다 긴 단위는 문장 경계에서 조각으로 나눠 보내고 다시 이어 붙임
+        max_chars = backend.max_batch_chars
+        units = []
+        pieces = {}  # 나눈 단위 위치 → 조각별 (번역, 성공 여부)
+        for idx, line in to_translate:
+            if batch_item_cost(line, 0) <= max_chars:
+                units.append((idx, line))
+                continue
+            parts = split_long_text(line, max_chars - batch_item_cost("", 0))
+            pieces[idx] = [None] * len(parts)
+            units.extend((TextPart(idx, k), part) for k, part in enumerate(parts))
+        batches = pack_translation_batches(units, max_chars)
+        joiner = "" if (target_lang or "").split('-')[0] in ("ja", "zh") else " "
+
+        split_note = f", 긴 줄 {len(pieces)}개 분할" if pieces else ""
+        self.log(f"번역({backend.name}): {len(batches)}개 배치 ({len(to_translate)}줄{split_note}, 동시 {workers}개)")
+
+        totals = {"realigned_lines": 0, "retry_requests": 0, "throttled": 0}  # 백엔드 통계 (배치별 합계)
+        totals_lock = threading.Lock()
+
+        def translate_batch(batch):
+            info = {}
+            try:
+                translated = backend.translate_batch([line for _, line in batch], source_lang, target_lang, info=info)
+            except Exception as e:
+                self.log(f"배치 오류: {str(e)[:50]}")
+                translated = [None] * len(batch)
+            with totals_lock:
+                for key, value in info.items():
+                    totals[key] = totals.get(key, 0) + value
+            return [(idx, text, True) if text else (idx, line, False) for (idx, line), text in zip(batch, translated)]
+
+        # 배치를 동시에 번역, 결과는 줄 번호 위치에 채움
+        started = time.perf_counter()
+        limiter = getattr(backend, "limiter", None)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.traced, f"{backend.name}_batch", translate_batch, batch) for batch in batches]
+            for done, future in enumerate(as_completed(futures), 1):
+                translated_batch = []
+                for idx, line, ok in future.result():
+                    if isinstance(idx, TextPart):
+                        parts = pieces[idx.slot]
+                        parts[idx.index] = (line, ok)
+                        if any(part is None for part in parts):
+                            continue  # 나머지 조각을 기다림
+                        idx, ok = idx.slot, all(part_ok for _, part_ok in parts)
+                        line = joiner.join(part for part, _ in parts) if ok else texts[idx]
+                    translated_batch.append((idx, line, ok))
+                self.failures += sum(1 for _, _, ok in translated_batch if not ok)
+                for idx, line, _ in translated_batch:
+                    for dup_idx in duplicates[normalize_line(texts[idx])]:
+                        place(dup_idx, line)
+                if memory:
+                    memory.put_many(memory_source, target_lang,
+                                    [(texts[idx], line) for idx, line, ok in translated_batch if ok])
+                self.set_progress(progress_offset + (done / len(batches)) * progress_range)
+                if done % 10 == 0 and done < len(batches):
+                    rate = f" (속도 {limiter.rate:.1f}회/s)" if limiter is not None else ""
+                    self.log(f"번역 진행: {done}/{len(batches)} 배치{rate}")
+        elapsed = time.perf_counter() - started
+        for i, cells in rows.items():
+            result[i] = '|'.join(cells)
+
+        lines_per_sec = len(to_translate) / elapsed if elapsed > 0 else 0.0
+        if totals["retry_requests"]:
+            self.log(f"마커 어긋남 복구: {totals['realigned_lines']}줄, 추가 요청 {totals['retry_requests']}회")
+        self.emit("translate_stats", backend=backend.name, lines=len(to_translate), batches=len(batches),
+                  chars=sum(len(line) for _, line in units), seconds=elapsed, lines_per_sec=lines_per_sec, **totals)
+        self.log(f"번역 완료({backend.name}): {total}줄 ({elapsed:.1f}초, {lines_per_sec:.1f}줄/s, 제한 {totals['throttled']}회)")
+        if memory:
+            stats = memory.stats()
+            self.emit("translation_memory_stats", **stats)
+            self.log(f"번역 메모리: {stats['entries']:,}개 항목, 적중률 {stats['hit_rate']:.0%}")
+        return '\n'.join(result)
+
+    def repair_locally(self, text):
+        """규칙 기반 로컬 수정 (local_repair가 꺼져 있으면 그대로 반환)"""
+        if not self.options.local_repair:
+            return text
+        started = time.perf_counter()
+        with self.span("local_repair", chars=len(text)):
+            text, counts = repair_markdown(text)
+        elapsed = time.perf_counter() - started
+        self.emit("local_repair_stats", seconds=elapsed, **counts)
+        if any(counts.values()):
+            self.log(f"로컬 수정: 번호 줄 {counts['page_numbers']}개, 빈 표 {counts['empty_tables']}개, "
+                     f"표 구분선 {counts['separators']}개, 글머리 {counts['bullets']}개 ({elapsed * 1000:.0f}ms)")
+        return text
+
+    def fix_with_glm_parallel(self, text, sink=None):
+        """GLM API로 마크다운 오류 수정 (로컬 수정 후 병렬 처리, 결함이 남은 청크만 전송)
+
+        sink가 있으면 청크가 끝나는 대로 문서 순서대로 sink(문자열)에 쓰고 None을 반환한다.
+        """
+        text = self.repair_locally(text)
+        if self.options.glm_fix_spans:
+            fixed = self.fix_spans_with_glm(text)
+            if sink is None:
+                return fixed
+            sink(fixed)
+            return None
+        # 앞쪽 빈 줄은 GLM에 보내지 않고 그대로 붙임, 청크 사이/뒤의 빈 줄은 청크별 원문 구분자로 보존
+        head = LEADING_BLANK_LINES_RE.match(text).group(0)
+        body = text[len(head):]
+        with self.span("split_chunks", chars=len(body)):
+            pairs = split_markdown_into_chunks(body, self.options.glm_chunk_tokens, separators=True)
+        chunks = [chunk for chunk, _ in pairs]
+        gaps = [gap for _, gap in pairs]
+        if self.options.glm_skip_clean:
+            targets = [idx for idx, chunk in enumerate(chunks) if find_markdown_defects(chunk)]
+        else:
+            targets = list(range(len(chunks)))
+
+        writer = None
+        on_chunk = None
+        if sink is not None:
+            # 결함 없는 청크는 바로 넣어 두고, 고친 청크는 끝나는 대로 넣으면 순서대로 써짐
+            sink(head)
+            writer = OrderedSink(sink)
+            suspect_set = set(targets)
+            for idx, chunk in enumerate(chunks):
+                if idx not in suspect_set:
+                    writer.put(idx, chunk + gaps[idx])
+
+            def on_chunk(position, result):
+                idx = targets[position]
+                writer.put(idx, result + gaps[idx])
+
+        started = time.perf_counter()
+        if targets:
+            suspect = [chunks[idx] for idx in targets]
+            if self.options.glm_async:
+                fixed = self.fix_chunks_with_glm_async(suspect, on_chunk=on_chunk)
+            else:
+                fixed = self.fix_chunks_with_glm(suspect, on_chunk=on_chunk)
+            if writer is None:
+                for idx, result in zip(targets, fixed):
+                    chunks[idx] = result
+        self.report_glm_skip(len(chunks), len(targets), time.perf_counter() - started)
+        if writer is not None:
+            return None
+        return head + "".join(chunk + gap for chunk, gap in zip(chunks, gaps))
+
+    def fix_spans_with_glm(self, text):
+        """결함 구간만 GLM으로 수정 - 구간을 줄 좌표로 잘라 보내고, 고친 결과를 같은 위치에 끼워 넣음
+
+        정상 문단을 다시 생성하지 않으므로 출력 토큰과 지연이 크게 줄어든다.
+        """
+        lines = text.split('\n')
+        spans = merge_spans(find_defect_spans(text))
+        if not spans:
+            self.log("GLM 생략: 결함 구간 없음")
+            return text
+
+        pieces = ['\n'.join(lines[start:end]) for start, end in spans]
+        sent_chars = sum(len(piece) for piece in pieces)
+        self.log(f"GLM 구간 수정: {len(spans)}개 구간, {sent_chars:,}/{len(text):,}자 ({sent_chars / max(1, len(text)):.0%})")
+        if self.options.glm_async:
+            fixed = self.fix_chunks_with_glm_async(pieces)
+        else:
+            fixed = self.fix_chunks_with_glm(pieces)
+
+        out = []
+        pos = 0
+        for (start, end), piece, result in zip(spans, pieces, fixed):
+            out.extend(lines[pos:start])
+            out.append(unwrap_code_block(result, piece) if result is not piece else piece)
+            pos = end
+        out.extend(lines[pos:])
+        self.emit("glm_span_stats", spans=len(spans), sent_chars=sent_chars, total_chars=len(text),
+                  sent_fraction=sent_chars / max(1, len(text)))
+        return '\n'.join(out)
+
+    def report_glm_skip(self, total_chunks, sent_chunks, elapsed):
+        """결함 없는 청크를 건너뛴 비율과 절약한 시간(보낸 청크의 평균 처리 시간 기준 추정) 보고"""
+        skipped = total_chunks - sent_chunks
+        if not skipped:
+            return
+        saved = elapsed / sent_chunks * skipped if sent_chunks else 0.0
+        self.emit("glm_skip_stats", chunks=total_chunks, skipped=skipped,
+                  skipped_fraction=skipped / total_chunks, saved_seconds=saved)
+        self.log(f"GLM 생략: 결함 없는 청크 {skipped}/{total_chunks}개 ({skipped / total_chunks:.0%}), "
+                 f"약 {saved:.1f}초 절약")
+
+    def fix_chunks_with_glm(self, chunks, on_chunk=None):
+        """공유 클라이언트와 슬라이딩 윈도우로 청크 수정, 청크 순서대로 결과 목록 반환 (실패한 청크는 원문)
+
+        on_chunk(번호, 결과)는 청크가 끝날 때마다 (완료 순서대로) 호출된다.
+        진행률은 받은 수정 결과 바이트 / 보낸 청크 바이트로 계산한다.
+        """
+        api_key = self.options.api_key.strip()
+        cache = self.open_glm_cache()
+        total_chunks = len(chunks)
+        client = self.open_glm_client()
+
+        if total_chunks == 1:
+            self.log("GLM 처리 중... (1개 청크)")
+        else:
+            self.log(f"GLM 병렬 처리: {total_chunks}개 청크 (동시 {self.options.glm_concurrency}~{self.options.glm_max_concurrency}개)")
+
+        scheduler = SlidingWindowScheduler(
+            concurrency=self.options.glm_concurrency,
+            max_concurrency=self.options.glm_max_concurrency,
+            retries=self.options.glm_retries,
+        )
+        done_count = 0
+        expected_bytes = max(1, sum(len(chunk.encode('utf-8')) for chunk in chunks))
+        received_bytes = 0
+        last_percent = -1
+        progress_lock = threading.Lock()
+
+        def on_bytes(count):
+            nonlocal received_bytes, last_percent
+            with progress_lock:
+                received_bytes += count
+                percent = int(min(95, 55 + min(1.0, received_bytes / expected_bytes) * 40))
+                if percent <= last_percent:
+                    return  # 실패한 스트림을 되돌려도 진행률은 뒤로 가지 않음
+                last_percent = percent
+            self.set_progress(percent)
+
+        def on_result(idx, result):
+            nonlocal done_count
+            done_count += 1
+            if isinstance(result, Exception):
+                self.failures += 1
+                self.log(f"청크 오류: {str(result)[:50]}")
+            if done_count % 10 == 0 and done_count < total_chunks:
+                self.log(f"GLM 처리 중... {done_count}/{total_chunks} 청크 (동시 {scheduler.limit}개)")
+            if on_chunk is not None:
+                on_chunk(idx, chunks[idx] if isinstance(result, Exception) else result)
+
+        # 캐시 적중은 스케줄러에 넣지 않음 (바로 끝나는 요청이 지연 기준을 0 가까이 끌어내려 동시성을 줄이지 않게)
+        results = [None] * total_chunks
+        pending = []
+        for idx, chunk in enumerate(chunks):
+            cached = cache.get("glm-4-flash", GLM_SYSTEM_PROMPT, chunk) if cache is not None else None
+            if cached is None:
+                pending.append(idx)
+                continue
+            self.metrics.record_cache_hit(self.source_name)
+            on_bytes(len(cached.encode('utf-8')))
+            results[idx] = cached
+            on_result(idx, cached)
+
+        fixed = scheduler.run(
+            pending,
+            lambda idx: self.traced("glm_chunk", fix_chunk_with_glm, chunks[idx], api_key, idx + 1, total_chunks,
+                                    cache, client, self.options.glm_stream, on_bytes, self.metrics, self.source_name,
+                                    lookup=False),
+            on_result=lambda position, result: on_result(pending[position], result),
+            sizes=[estimate_tokens(GLM_SYSTEM_PROMPT) + estimate_tokens(chunks[idx]) for idx in pending],
+        )
+        for idx, result in zip(pending, fixed):
+            results[idx] = chunks[idx] if isinstance(result, Exception) else result
+        self.metrics.record_retries(self.source_name, scheduler.retried)
+        if scheduler.retried or scheduler.throttled:
+            self.log(f"GLM 재시도 {scheduler.retried}회 (429/5xx {scheduler.throttled}회)")
+
+        self.log_glm_cache_stats()
+        stats = client.stats()
+        self.emit("glm_client_stats", **stats)
+        self.log(f"GLM 연결: 요청 {stats['requests']}회, 새 연결 {stats['new_connections']}개, 재사용 {stats['reused']}회")
+        return results
+
+    def fix_chunks_with_glm_async(self, chunks, on_chunk=None):
+        """asyncio 경로로 청크 수정 - 모든 문서가 같은 이벤트 루프와 동시 요청 한도를 공유, 결과 목록 반환"""
+        runner = self.open_async_glm_runner()
+        self.log(f"GLM 비동기 처리: {len(chunks)}개 청크 (전체 동시 최대 {runner.concurrency}개)")
+
+        with self.span("glm_async_chunks", chunks=len(chunks)):
+            results = runner.fix_chunks(chunks, document=self.source_name)
+        fixed = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                self.failures += 1
+                self.log(f"청크 오류: {str(result)[:50]}")
+                fixed.append(chunk)
+            else:
+                fixed.append(result)
+            if on_chunk is not None:
+                on_chunk(len(fixed) - 1, fixed[-1])
+        self.set_progress(95)
+
+        self.log_glm_cache_stats()
+        stats = runner.stats()
+        self.emit("glm_client_stats", **stats)
+        self.log(f"GLM 연결: 요청 {stats['requests']}회, 새 연결 {stats['new_connections']}개, "
+                 f"최대 동시 {stats['peak_in_flight']}개")
+        return fixed
+
+    def fix_with_glm(self, text):
+        """GLM API로 마크다운 오류만 수정 (번역 없음, glm-4-plus 스트리밍)"""
+        from zhipuai import ZhipuAI
+
+        text = self.repair_locally(text)
+        if self.options.glm_skip_clean and not find_markdown_defects(text):
+            self.emit("glm_skip_stats", chunks=1, skipped=1, skipped_fraction=1.0, saved_seconds=0.0)
+            self.log("GLM 생략: 로컬 검사에서 결함 없음")
+            return text
+
+        cache = self.open_glm_cache()
+        if cache is not None:
+            cached = cache.get("glm-4-plus", GLM_SYSTEM_PROMPT, text)
+            if cached is not None:
+                self.metrics.record_cache_hit(self.source_name)
+                self.log(f"GLM 캐시 적중: {len(text):,}자 (API 호출 생략)")
+                return cached
+
+        client = ZhipuAI(api_key=self.options.api_key.strip())
+
+        total_chars = len(text)
+        self.log(f"GLM 오류 수정 중... (원본: {total_chars:,}자)")
+
+        request = {
+            "model": "glm-4-plus",
+            "messages": [
+                {"role": "system", "content": GLM_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Fix this markdown (do not translate):\n\n{text}"}
+            ],
+            "max_tokens": 16384,
+            "temperature": 0.2,
+            "stream": True,
+        }
+        bytes_sent = len(json.dumps(request, ensure_ascii=False).encode('utf-8'))  # 다른 경로처럼 요청 본문 크기
+        started = time.perf_counter()
+        response = client.chat.completions.create(**request)
+
+        result = []
+        char_count = 0
+        last_log = 0
+        usage = None
+
+        for chunk in response:
+            if getattr(chunk, "usage", None):
+                usage = {"prompt_tokens": chunk.usage.prompt_tokens, "completion_tokens": chunk.usage.completion_tokens}
+            if chunk.choices and chunk.choices[0].delta.content:
+                content = chunk.choices[0].delta.content
+                result.append(content)
+                char_count += len(content)
+
+                if char_count - last_log >= 1000:
+                    last_log = char_count
+                    pct = min(100, int((char_count / total_chars) * 100))
+                    self.log(f"수정 중... {char_count:,}/{total_chars:,}자 ({pct}%)")
+                    self.set_progress(55 + min(40, (char_count / total_chars) * 40))
+
+        final_text = ''.join(result)
+        self.tracer.record("glm_plus_request", started, time.perf_counter() - started, document=self.source_name)
+        prompt_tokens, completion_tokens = glm_usage_tokens(usage, text, final_text)
+        self.metrics.record_call(self.source_name, "glm-4-plus", prompt_tokens, completion_tokens,
+                                 latency=time.perf_counter() - started, bytes_sent=bytes_sent,
+                                 bytes_received=len(final_text.encode('utf-8')))
+        self.log(f"오류 수정 완료: {len(final_text):,}/{total_chars:,}자")
+        if cache is not None and final_text:
+            cache.put("glm-4-plus", GLM_SYSTEM_PROMPT, text, final_text)
+        return final_text
+
+    def translate_text(self, text, source_lang, target_lang, progress_offset=0, progress_range=100, sink=None):
+        """번역 백엔드(기본 Google)로 번역 후 GLM으로 오류 수정
+
+        sink가 있으면 결과를 sink(문자열)에 쓰고 None을 반환한다. glm-4-flash 경로는 청크가 끝나는 대로 순서대로 쓴다.
+        """
+        if not text.strip():
+            if sink is None:
+                return text
+            sink(text)
+            return None
+
+        self.log(f"문서 처리 시작... ({len(text):,} 문자)")
+        self.set_progress(5)
+
+        result = text
+
+        # 1단계: 번역 (선택한 백엔드, 기본 Google)
+        if self.translation_available():
+            name = self.translation_backend.name
+            self.log(f"[ 1단계 ] 번역 시작 ({name})...")
+            try:
+                with self.span("translate", chars=len(text), backend=name):
+                    result = self.translate_with_google(text, source_lang, target_lang)
+                self.log("번역 완료!")
+            except Exception as e:
+                self.log(f"번역 오류({name}): {e}")
+
+        self.set_progress(50)
+
+        # 2단계: GLM 오류 수정
+        if self.options.fix_errors and self.options.api_key.strip():
+            parallel = self.options.glm_model != "glm-4-plus"
+            self.log("[ 2단계 ] GLM 오류 수정 시작 (병렬 처리)..." if parallel else "[ 2단계 ] GLM 오류 수정 시작...")
+            wrote = False
+
+            def glm_sink(piece):
+                nonlocal wrote
+                if piece:
+                    wrote = True  # 빈 앞부분(head)만 쓴 상태에서 실패하면 원문으로 대신 쓸 수 있음
+                sink(piece)
+
+            try:
+                with self.span("glm_fix", chars=len(result)):
+                    if parallel:
+                        result = self.fix_with_glm_parallel(result, sink=glm_sink if sink is not None else None)
+                    else:
+                        result = self.fix_with_glm(result)
+                self.log("GLM 오류 수정 완료!")
+            except Exception as e:
+                if wrote:
+                    raise  # 이미 일부를 썼으므로 원문으로 대신 쓸 수 없음
+                self.log(f"GLM 오류: {e}")
+        elif self.options.fix_errors and self.options.local_repair:
+            self.log("API Key 없음, 로컬 규칙 수정만 적용")
+            result = self.repair_locally(result)
+        elif self.options.fix_errors:
+            self.log("경고: API Key 없음, 오류 수정 스킵")
+
+        self.set_progress(95)
+        if sink is not None and result is not None:
+            sink(result)
+            return None
+        return result
+
+    def translate_file(self, input_path, output_folder=None):
+        input_path = Path(input_path)
+        self.log(f"번역: {input_path.name}")
+        self.set_progress(5)
+        with open(input_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        output_folder = Path(output_folder) if output_folder else input_path.parent
+        output_folder.mkdir(parents=True, exist_ok=True)
+        output_path = output_folder / f"{input_path.stem}{self.options.translated_suffix}.md"
+
+        source = self.options.source_lang
+        target = self.options.target_lang or "ko"
+        self.log(f"번역: {source} → {target}")
+
+        # 결과는 임시 파일에 흘려 쓰고 성공하면 교체 (GUI는 접미사 없이 입력 파일 자리에 저장)
+        with atomic_output(output_path) as f:
+            self.translate_text(content, source, target, progress_offset=5, progress_range=90, sink=f.write)
+        self.set_progress(100)
+        self.log(f"저장: {output_path}")
+        return output_path
+
+    def simplify_image_names(self, image_folder, md_text, rel_folder):
+        """이미지 파일명 간소화"""
+        import shutil
+        image_files = sorted(image_folder.glob("*.*"))
+
+        # 이름표를 먼저 만들고 문서는 한 번만 훑어서 바꿈 (이미지마다 문서 전체를 replace하지 않음)
+        renames = {}
+        for i, img_path in enumerate(image_files, 1):
+            ext = img_path.suffix.lower()
+            new_name = f"img_{i:03d}{ext}"
+            new_path = image_folder / new_name
+            old_ref = img_path.name
+
+            if img_path != new_path:
+                shutil.move(str(img_path), str(new_path))
+                renames[old_ref] = new_name
+
+        renames[str(image_folder).replace("\\", "/")] = rel_folder
+        renames[str(image_folder)] = rel_folder
+        md_text = replace_many(md_text, renames)
+
+        self.log(f"이미지 {len(image_files)}개 간소화 완료")
+        return md_text
+
+    def convert_pages_parallel(self, pdf_path, image_folder=None):
+        """PDF를 페이지 구간으로 나눠 프로세스 풀에서 변환, 페이지 순서대로 텍스트 목록 반환"""
+        page_count = get_page_count(pdf_path)
+        shards = plan_page_shards(page_count, self.options.processes, self.options.pages_per_shard)
+        self.log(f"PDF 병렬 변환: {page_count}페이지 → {len(shards)}개 구간 ({self.options.processes}개 프로세스)")
+
+        pool = self.process_pool
+        own_pool = pool is None
+        if own_pool:
+            pool = ProcessPoolExecutor(max_workers=self.options.processes)
+
+        results = [None] * len(shards)
+        try:
+            with self.span("identify_headers"):
+                hdr_info = identify_headers(pdf_path)
+            futures = {
+                pool.submit(convert_page_range, str(pdf_path), shard, self.options.extract_images,
+                            str(image_folder) if image_folder else None, hdr_info): idx
+                for idx, shard in enumerate(shards)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                self.set_progress(10 + (done / len(shards)) * 25)
+        finally:
+            if own_pool:
+                pool.shutdown(cancel_futures=True)
+
+        return [text for shard_texts in results for text in shard_texts]
+
+    def iter_pdf_pages(self, pdf_path, image_folder=None):
+        """PDF 페이지를 순서대로 하나씩 변환해서 내보내는 생성기 (page_no, text)
+
+        processes가 2 이상이면 앞쪽 구간 몇 개를 프로세스 풀에 미리 넣어 두고 순서대로 꺼낸다.
+        체크포인트가 있으면 내용 해시가 같은 페이지는 저장된 변환 결과를 쓰고 나머지만 변환한다.
+        이미지 추출 시에는 이미지 파일을 다시 써야 하므로 변환 체크포인트를 쓰지 않는다.
+        """
+        page_count = get_page_count(pdf_path)
+        shard_size = self.options.pages_per_shard or 2
+        shards = plan_page_shards(page_count, self.options.processes, shard_size)
+        image_path = str(image_folder) if image_folder else None
+
+        checkpoints = self.checkpoints if not self.options.extract_images else None
+        page_hashes = get_page_hashes(pdf_path) if checkpoints is not None else None
+        header_table = []  # 제목 수준표는 변환할 페이지가 처음 나올 때 한 번만 만듦 (전부 체크포인트면 생략)
+
+        def hdr_info():
+            if not header_table:
+                with self.span("identify_headers"):
+                    header_table.append(identify_headers(pdf_path))
+            return header_table[0]
+
+        def cached_pages(shard):
+            if checkpoints is None:
+                return {}
+            found = {}
+            for page_no in shard:
+                text = checkpoints.get("convert", (page_hashes[page_no],))
+                if text is not None:
+                    found[page_no] = text
+            return found
+
+        def merge(shard, cached, missing, texts):
+            converted = dict(zip(missing, texts))
+            for page_no, text in converted.items():
+                if checkpoints is not None:
+                    checkpoints.put("convert", (page_hashes[page_no],), text)
+            for page_no in shard:
+                yield page_no, cached[page_no] if page_no in cached else converted[page_no]
+
+        if self.options.processes <= 1:
+            for shard in shards:
+                cached = cached_pages(shard)
+                missing = [page_no for page_no in shard if page_no not in cached]
+                texts = []
+                if missing:
+                    with self.span("convert_shard", pages=len(missing)):
+                        texts = convert_page_range(str(pdf_path), missing, self.options.extract_images, image_path,
+                                                   hdr_info())
+                yield from merge(shard, cached, missing, texts)
+            return
+
+        pool = self.process_pool
+        own_pool = pool is None
+        if own_pool:
+            pool = ProcessPoolExecutor(max_workers=self.options.processes)
+        lookahead = self.options.processes * 2
+        pending = []
+
+        def finish(shard, cached, missing, future):
+            # 변환은 다른 프로세스에서 하므로 여기서는 결과를 기다린 시간을 잰다
+            with self.span("convert_shard_wait", pages=len(missing)):
+                texts = future.result() if future else []
+            return merge(shard, cached, missing, texts)
+
+        try:
+            for shard in shards:
+                cached = cached_pages(shard)
+                missing = [page_no for page_no in shard if page_no not in cached]
+                future = pool.submit(convert_page_range, str(pdf_path), missing,
+                                     self.options.extract_images, image_path, hdr_info()) if missing else None
+                pending.append((shard, cached, missing, future))
+                if len(pending) >= lookahead:
+                    yield from finish(*pending.pop(0))
+            for item in pending:
+                yield from finish(*item)
+        finally:
+            if own_pool:
+                pool.shutdown(cancel_futures=True)
+
+    def rename_page_images(self, page_text, image_folder, rel_folder, renamed):
+        """페이지에서 참조하는 이미지를 등장 순서대로 img_NNN으로 바꿈 (스트리밍용, renamed는 문서 전체 이름표)"""
+        import shutil
+
+        def replace_ref(match):
+            name = match.group(2).strip().replace("\\", "/").rsplit("/", 1)[-1]
+            if name not in renamed:
+                src = image_folder / name
+                if not src.exists():
+                    return match.group(0)
+                new_name = f"img_{len(renamed) + 1:03d}{src.suffix.lower()}"
+                shutil.move(str(src), str(image_folder / new_name))
+                renamed[name] = new_name
+            return f"![{match.group(1)}]({rel_folder}/{renamed[name]})"
+
+        return IMAGE_REF_RE.sub(replace_ref, page_text)
+
+    def stream_pdf(self, pdf_path, output_path, image_folder=None, rel_image_folder=None):
+        """페이지 단위 스트리밍 파이프라인: 추출 → 번역 → GLM 수정 → 파일에 바로 추가
+
+        단계마다 스레드 하나가 페이지를 순서대로 처리하고, 단계 사이는 크기 제한 큐로 연결해
+        앞 단계가 너무 앞서가지 않게 한다. 메모리에는 큐에 든 페이지만 남는다.
+        이미지 번호는 페이지 등장 순서로 매긴다.
+        체크포인트가 있으면 단계마다 성공한 페이지 출력을 바로 기록하고, 같은 입력이면 기록을 재사용한다.
+        """
+        self.open_shared_resources()
+        checkpoints = self.checkpoints
+
+        def forward(event, data):
+            # 페이지마다 나오는 세부 진행률/로그는 숨기고 오류/경고와 통계 이벤트만 전달
+            if event == "progress":
+                return
+            if event == "log" and "오류" not in data["message"] and "경고" not in data["message"]:
+                return
+            for callback in self.listeners:
+                callback(event, data)
+
+        # 단계마다 작업 엔진을 따로 둬서 실패 횟수(failures)가 섞이지 않게 함
+        translate_worker, fix_worker = self.spawn_worker(), self.spawn_worker()
+        translate_worker.listeners = fix_worker.listeners = [forward]
+
+        translate = bool(self.options.target_lang)
+        use_glm = bool(self.options.api_key.strip())
+        fix = translate and self.options.fix_errors and (use_glm or self.options.local_repair)
+        source, target = self.options.source_lang, self.options.target_lang
+        size = self.options.stream_queue_size
+        stop = threading.Event()
+        errors = []
+        total_pages = get_page_count(pdf_path)
+
+        def put(q, item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return None
+
+        def stage(name, func, q_in, q_out):
+            def run():
+                try:
+                    while True:
+                        item = get(q_in)
+                        if item is None:
+                            break
+                        with self.span(f"stream_{name}", page=item[0]):
+                            output = func(item[1])
+                        put(q_out, (item[0], output))
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+                finally:
+                    put(q_out, None)
+            return threading.Thread(target=run, name=f"stream-{name}", daemon=True)
+
+        def extract():
+            try:
+                renamed = {}
+                for page_no, text in self.iter_pdf_pages(pdf_path, image_folder):
+                    if image_folder is not None:
+                        with self.span("rename_page_images", page=page_no):
+                            text = self.rename_page_images(text, image_folder, rel_image_folder, renamed)
+                    put(pages_q, (page_no, text))
+                    if stop.is_set():
+                        break
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(pages_q, None)
+
+        def checkpointed(stage_name, worker, func, *key):
+            # 실패 없이 끝난 페이지만 기록 (원문이 섞인 결과는 다음 실행에서 다시 처리)
+            def run(text):
+                if checkpoints is not None:
+                    saved = checkpoints.get(stage_name, (*key, text))
+                    if saved is not None:
+                        return saved
+                failures = worker.failures
+                try:
+                    result = func(text)
+                except Exception as e:
+                    worker.log(f"{'번역' if stage_name == 'translate' else 'GLM'} 오류: {e}")
+                    return text
+                if checkpoints is not None and worker.failures == failures:
+                    checkpoints.put(stage_name, (*key, text), result)
+                return result
+            return run
+
+        # 체크포인트 키에는 단계 출력을 바꾸는 설정을 모두 넣음 (백엔드/모델/옵션을 바꾼 재개가 예전 결과를 쓰지 않게)
+        if not translate:
+            translate_page = None
+        elif self.translation_available():
+            translate_page = checkpointed("translate", translate_worker,
+                                          lambda text: translate_worker.translate_with_google(text, source, target),
+                                          source, target, self.translation_backend.cache_key,
+                                          f"tables={self.options.translate_table_cells}",
+                                          f"markup={self.options.translate_mask_markup}")
+        else:
+            translate_page = lambda text: text  # 번역 불가: 원본 유지 (translate_text와 같음)
+        glm_key = (f"repair={self.options.local_repair}", f"skip_clean={self.options.glm_skip_clean}")
+        if not use_glm:
+            fix_page = fix_worker.repair_locally
+        elif self.options.glm_model == "glm-4-plus":
+            fix_page = checkpointed("fix", fix_worker, fix_worker.fix_with_glm,
+                                    "glm-4-plus", GLM_SYSTEM_PROMPT, *glm_key)
+        else:
+            fix_page = checkpointed("fix", fix_worker, fix_worker.fix_with_glm_parallel,
+                                    self.options.glm_model, GLM_SYSTEM_PROMPT, *glm_key,
+                                    f"spans={self.options.glm_fix_spans}",
+                                    f"chunk_tokens={self.options.glm_chunk_tokens}")
+
+        pages_q = queue.Queue(maxsize=size)
+        threads = [threading.Thread(target=extract, name="stream-extract", daemon=True)]
+        last_q = pages_q
+        if translate:
+            translated_q = queue.Queue(maxsize=size)
+            threads.append(stage("translate", translate_page, last_q, translated_q))
+            last_q = translated_q
+        if fix:
+            fixed_q = queue.Queue(maxsize=size)
+            threads.append(stage("fix", fix_page, last_q, fixed_q))
+            last_q = fixed_q
+
+        self.log(f"스트리밍 처리: 추출{' → 번역' if translate else ''}{(' → GLM 수정' if use_glm else ' → 로컬 수정') if fix else ''} → 저장")
+        for thread in threads:
+            thread.start()
+
+        written = 0
+        try:
+            with atomic_output(output_path) as f:
+                while True:
+                    item = get(last_q)
+                    if item is None:
+                        break
+                    page_no, text = item
+                    f.write(text)
+                    if self.options.page_chunks:
+                        f.write(f"\n\n---\n<!-- Page {page_no+1} -->\n\n")
+                    f.flush()
+                    written += 1
+                    self.set_progress(10 + (written / max(1, total_pages)) * 85)
+                    if written % 20 == 0:
+                        self.log(f"저장 진행: {written}/{total_pages} 페이지")
+        finally:
+            # 정상 종료면 모든 단계가 이미 끝났고, 저장 중 오류면 남은 단계를 멈춤
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+        self.log(f"스트리밍 완료: {written}페이지")
+        if checkpoints is not None:
+            stats = checkpoints.stats()
+            self.emit("checkpoint_stats", **stats)
+            reused = ", ".join(f"{name} {count}" for name, count in stats["hits"].items()) or "없음"
+            self.log(f"체크포인트 재사용: {reused} (페이지)")
+
+    def convert_pdf(self, pdf_path, output_folder=None):
+        import pymupdf4llm
+        pdf_path = Path(pdf_path)
+        self.log(f"변환: {pdf_path.name}")
+        self.set_progress(10)
+
+        output_folder = Path(output_folder) if output_folder else pdf_path.parent
+        output_folder.mkdir(parents=True, exist_ok=True)
+        output_path = output_folder / f"{pdf_path.stem}.md"
+
+        image_folder = None
+        simple_image_folder = None
+        if self.options.extract_images:
+            simple_name = sanitize_filename(pdf_path.stem)
+            simple_image_folder = output_folder / f"{simple_name}_images"
+            simple_image_folder.mkdir(parents=True, exist_ok=True)
+            image_folder = simple_image_folder
+
+        rel_image_folder = f"./{simple_image_folder.name}" if simple_image_folder else None
+
+        if self.options.streaming or self.options.checkpoint:
+            self.stream_pdf(pdf_path, output_path, image_folder, rel_image_folder)
+            self.set_progress(100)
+            self.log(f"저장: {output_path}")
+            return output_path
+
+        with self.span("pdf_to_markdown", processes=self.options.processes):
+            if self.options.processes > 1:
+                # 페이지별 텍스트를 순서대로 이어 붙이면 순차 변환 결과와 같음
+                page_texts = self.convert_pages_parallel(pdf_path, image_folder)
+                md_text = assemble_pages(page_texts, self.options.page_chunks)
+            elif self.options.page_chunks:
+                chunks = pymupdf4llm.to_markdown(str(pdf_path), page_chunks=True, write_images=self.options.extract_images, image_path=str(image_folder) if image_folder else None)
+                md_text = assemble_pages((chunk.get('text', '') if isinstance(chunk, dict) else str(chunk) for chunk in chunks), True)
+            else:
+                md_text = pymupdf4llm.to_markdown(str(pdf_path), write_images=self.options.extract_images, image_path=str(image_folder) if image_folder else None)
+
+        if image_folder and image_folder.exists():
+            with self.span("simplify_image_names"):
+                md_text = self.simplify_image_names(image_folder, md_text, rel_image_folder)
+
+        self.set_progress(40)
+        self.log("PDF 변환 완료")
+
+        # 번역/수정 결과는 끝나는 대로 임시 파일에 쓰고 (glm-4-flash 경로는 청크 단위) 성공하면 교체
+        with atomic_output(output_path) as f:
+            if self.options.target_lang:
+                source = self.options.source_lang
+                target = self.options.target_lang
+                self.log(f"번역: {source} → {target}")
+                self.translate_text(md_text, source, target, progress_offset=40, progress_range=55, sink=f.write)
+            else:
+                f.write(md_text)
+        self.set_progress(100)
+        self.log(f"저장: {output_path}")
+        return output_path
+
+    def process_file(self, input_path):
+        """확장자에 따라 PDF 변환 또는 MD 번역 실행, 저장 경로 반환 (건너뛰면 None)"""
+        input_path = Path(input_path)
+        output_folder = self.options.output_folder or None
+        ext = input_path.suffix.lower()
+        # GLM 지표는 문서 이름(source_name)별로 집계
+        self.source_name = self.source_name or input_path.name
+
+        try:
+            with self.span("process_file"):
+                if ext == '.pdf':
+                    return self.convert_pdf(input_path, output_folder)
+                if ext == '.md':
+                    if not self.options.target_lang:
+                        self.log(f"건너뜀: {input_path.name} (MD 파일은 번역 언어 필요)")
+                        return None
+                    return self.translate_file(input_path, output_folder)
+                raise ValueError(f"지원하지 않는 형식: {ext}")
+        finally:
+            self.report_glm_metrics()
+            self.report_stage_timings()
+
+    def report_stage_timings(self):
+        """현재 문서의 단계별 소요 시간을 이벤트로 알리고 오래 걸린 단계를 로그에 표시"""
+        timings = self.tracer.summary(self.source_name)
+        if not timings:
+            return
+        self.emit("stage_timings", stages=timings)
+        top = sorted(timings.items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+        top = [(name, stats) for name, stats in top if name != "process_file"][:4]
+        if top:
+            self.log("단계별 시간: " + ", ".join(f"{name} {stats['total_seconds']:.2f}초({stats['count']})"
+                                             for name, stats in top))
+
+    def report_glm_metrics(self):
+        """현재 문서의 GLM 지표를 이벤트로 알리고 total_tokens_used에 반영"""
+        stats = self.metrics.document(self.source_name)
+        self.total_tokens_used = stats["total_tokens"]
+        if not stats["calls"] and not stats["cache_hits"]:
+            return
+        self.emit("glm_metrics", **stats)
+        self.log(f"GLM 사용량: 호출 {stats['calls']}회 (오류 {stats['errors']}, 재시도 {stats['retries']}, "
+                 f"캐시 {stats['cache_hits']}), 토큰 {stats['prompt_tokens']:,}+{stats['completion_tokens']:,}, "
+                 f"예상 비용 ${stats['cost_usd']:.4f}")
+
+    def planned_outputs(self, input_path):
+        """process_file이 쓸 경로 목록 (마크다운 파일, 이미지 추출 시 이미지 폴더), 건너뛸 파일이면 빈 목록"""
+        input_path = Path(input_path)
+        folder = Path(self.options.output_folder) if self.options.output_folder else input_path.parent
+        if input_path.suffix.lower() == '.pdf':
+            outputs = [folder / f"{input_path.stem}.md"]
+            if self.options.extract_images:
+                outputs.append(folder / f"{sanitize_filename(input_path.stem)}_images")
+            return outputs
+        if input_path.suffix.lower() == '.md' and self.options.target_lang:
+            return [folder / f"{input_path.stem}{self.options.translated_suffix}.md"]
+        return []
+
+    def output_conflicts(self, paths):
+        """출력 경로가 다른 파일의 출력이나 입력과 겹치는 파일 {경로: 오류} 반환
+
+        -o로 여러 폴더의 같은 이름 파일을 한 폴더에 모으면 .md와 _images 폴더를 서로 덮어쓰므로
+        시작 전에 찾아서 겹치는 파일은 모두 처리하지 않는다.
+        """
+        def key(path):
+            return os.path.normcase(str(Path(path).resolve()))
+
+        inputs = {key(path): path for path in paths}
+        owners = {}
+        for path in paths:
+            for target in self.planned_outputs(path):
+                owners.setdefault(key(target), []).append(path)
+
+        conflicts = {}
+        for target, owners_of in owners.items():
+            # 자기 자신을 덮어쓰는 번역(접미사 "")은 허용, 다른 입력 파일을 덮어쓰는 것은 충돌
+            involved = list(owners_of)
+            if target in inputs and inputs[target] not in involved:
+                involved.append(inputs[target])
+            if len(involved) < 2:
+                continue
+            for path in involved:
+                others = ", ".join(str(other) for other in involved if other != path)
+                conflicts[path] = ValueError(f"출력 경로 충돌: {target} ({others}와 겹침, 출력 폴더를 나눠 주세요)")
+        return conflicts
+
+    def run_batch(self, paths, max_workers=None):
+        """여러 파일을 동시에 처리, {경로: 저장 경로 또는 예외} 반환
+
+        processes가 2 이상이면 프로세스 풀 하나를 모든 파일의 페이지 구간 변환에 공유한다.
+        출력 경로가 겹치는 파일은 처리하지 않고 오류로 돌려준다.
+        """
+        paths = [Path(p) for p in paths]
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        results = {}
+
+        done = 0
+        conflicts = self.output_conflicts(paths)
+        for path, error in conflicts.items():
+            done += 1
+            results[path] = error
+            self.emit("file_error", path=str(path), error=str(error), done=done, total=len(paths))
+        paths_to_run = [path for path in paths if path not in conflicts]
+
+        self.open_shared_resources()
+        if self.options.processes > 1 and any(p.suffix.lower() == '.pdf' for p in paths_to_run):
+            self.process_pool = ProcessPoolExecutor(max_workers=self.options.processes)
+
+        def run_one(path):
+            # 지표/추적은 문서별로 집계되므로 다른 폴더의 같은 이름 파일이 섞이지 않게 전체 경로로 구분
+            worker = self.spawn_worker(str(path.resolve()))
+            output_path = worker.process_file(path)
+            return output_path, worker.total_tokens_used
+
+        if self.profiler is not None:
+            self.profiler.start()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(run_one, path): path for path in paths_to_run}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    done += 1
+                    try:
+                        output_path, tokens = future.result()
+                        self.total_tokens_used += tokens
+                        results[path] = output_path
+                        self.emit("file_done", path=str(path), output=str(output_path) if output_path else None,
+                                  done=done, total=len(paths))
+                    except Exception as e:
+                        results[path] = e
+                        self.emit("file_error", path=str(path), error=str(e), done=done, total=len(paths))
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+            if self.process_pool:
+                self.process_pool.shutdown()
+                self.process_pool = None
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF → Markdown 변환 + 번역 + GLM 오류 수정 (일괄 처리)")
+    parser.add_argument("inputs", nargs="+", help="PDF/MD 파일, 폴더 또는 글롭 패턴")
+    parser.add_argument("-o", "--output", help="출력 폴더 (기본: 입력 파일과 같은 폴더)")
+    parser.add_argument("-s", "--source", default="auto", help="소스 언어 (기본: auto)")
+    parser.add_argument("-t", "--target", help="번역 언어 (예: ko, en, ja, zh-CN). 생략 시 번역 안함")
+    parser.add_argument("--images", action="store_true", help="이미지 추출")
+    parser.add_argument("--page-chunks", action="store_true", help="페이지별 구분선")
+    parser.add_argument("--fix", action="store_true", help="GLM 마크다운 오류 수정")
+    parser.add_argument("--model", default="glm-4-flash", choices=["glm-4-flash", "glm-4-plus"], help="GLM 모델")
+    parser.add_argument("--api-key", help="GLM API Key (기본: GLM_API_KEY 환경변수 또는 설정 파일)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="동시 처리 파일 수")
+    parser.add_argument("--translate-workers", type=int, default=4, help="동시 번역 배치 수 (기본: 4)")
+    parser.add_argument("--translate-rate", type=float, default=5.0, help="초기 번역 요청 속도 회/s (기본: 5)")
+    parser.add_argument("--translate-batch-chars", type=int, default=GOOGLE_BATCH_CHARS,
+                        help=f"번역 요청당 최대 문자 수, 긴 줄은 문장 단위로 나눔 (기본: {GOOGLE_BATCH_CHARS})")
+    parser.add_argument("--translate-backend", choices=TRANSLATION_BACKENDS, default="google",
+                        help="번역 백엔드: google(기본), glossary(용어집, 오프라인), libretranslate(자체 호스팅 서버)")
+    parser.add_argument("--glossary", help="glossary 백엔드 용어집 (원문<탭>번역 TSV 또는 JSON)")
+    parser.add_argument("--translate-url", help=f"libretranslate 백엔드 주소 (기본: {LIBRETRANSLATE_URL})")
+    parser.add_argument("--translate-api-key", default="", help="libretranslate 백엔드 API Key")
+    parser.add_argument("--translate-table-rows", action="store_true",
+                        help="표 행 전체를 번역 (기본: 글이 있는 셀만 번역하고 격자 유지)")
+    parser.add_argument("--translate-markup", action="store_true",
+                        help="코드 블록, 인라인 코드, 링크 주소, 수식, HTML 주석도 번역에 보냄 (기본: 가림)")
+    parser.add_argument("--tm", default=str(TRANSLATION_MEMORY_FILE), help="번역 메모리(SQLite) 경로")
+    parser.add_argument("--no-tm", action="store_true", help="번역 메모리 사용 안함")
+    parser.add_argument("--tm-max-entries", type=int, default=200_000, help="번역 메모리 최대 항목 수")
+    parser.add_argument("--glm-cache", default=str(GLM_CACHE_FILE), help="GLM 수정 캐시(SQLite) 경로")
+    parser.add_argument("--no-glm-cache", action="store_true", help="GLM 수정 캐시 사용 안함")
+    parser.add_argument("--glm-cache-max-mb", type=int, default=256, help="GLM 수정 캐시 최대 크기 (MB)")
+    parser.add_argument("--glm-connections", type=int, default=8, help="GLM 연결 풀 크기 (기본: 8)")
+    parser.add_argument("--http2", action="store_true", help="GLM 요청에 HTTP/2 사용 (pip install httpx[http2])")
+    parser.add_argument("--glm-concurrency", type=int, default=4, help="GLM 처음 동시 요청 수 (기본: 4)")
+    parser.add_argument("--glm-max-concurrency", type=int, default=8, help="GLM 최대 동시 요청 수 (기본: 8)")
+    parser.add_argument("--glm-retries", type=int, default=3, help="GLM 요청 재시도 횟수 (기본: 3)")
+    parser.add_argument("--glm-timeout", type=float, default=120.0, help="GLM 요청 타임아웃 초 (기본: 120)")
+    parser.add_argument("--glm-url", default=GLM_API_URL, help="GLM 채팅 완성 엔드포인트 (프록시, 로컬 테스트 서버)")
+    parser.add_argument("--glm-chunk-tokens", type=int, default=GLM_CHUNK_TOKENS,
+                        help=f"GLM 청크당 토큰 예산 (표/코드 블록은 자르지 않음, 기본: {GLM_CHUNK_TOKENS})")
+    parser.add_argument("--glm-all", action="store_true",
+                        help="로컬 검사에서 결함이 없는 청크도 GLM에 보냄 (기본: 결함 있는 청크만)")
+    parser.add_argument("--no-local-repair", action="store_true",
+                        help="GLM 전 규칙 기반 수정(번호 줄, 빈 표, 표 구분선, 글머리 잔재) 사용 안함")
+    parser.add_argument("--glm-spans", action="store_true",
+                        help="청크 전체 대신 결함 구간(깨진 표 등)만 GLM에 보내고 제자리에 끼워 넣음")
+    parser.add_argument("--glm-stream", action="store_true",
+                        help="glm-4-flash 응답을 SSE 스트리밍으로 받음 (받은 바이트 기준 진행률)")
+    parser.add_argument("--glm-async", action="store_true",
+                        help="asyncio 경로 사용 (모든 파일의 청크를 이벤트 루프 하나에서 처리)")
+    parser.add_argument("--glm-async-concurrency", type=int, default=64, help="asyncio 경로 동시 요청 수 (기본: 64)")
+    parser.add_argument("--stream", action="store_true",
+                        help="PDF를 페이지 단위로 추출/번역/수정하며 결과를 바로 파일에 추가")
+    parser.add_argument("--stream-queue", type=int, default=4, help="스트리밍 단계 사이 큐 크기 (페이지, 기본: 4)")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="PDF 변환 프로세스 수 (기본: 1 = 순차 변환, 큰 PDF는 CPU 코어 수 정도 권장)")
+    parser.add_argument("--pages-per-shard", type=int, default=0, help="병렬 변환 구간당 페이지 수 (0이면 자동)")
+    parser.add_argument("--resume", action="store_true",
+                        help="페이지 체크포인트 사용 (중단된 작업 재개, 바뀐 페이지만 재처리, --stream 포함)")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_FILE), help="페이지 체크포인트(SQLite) 경로")
+    parser.add_argument("--metrics", help="GLM 사용량 지표 저장 경로 (.json이면 JSON, 그 외에는 Prometheus 텍스트)")
+    parser.add_argument("--trace", help="단계별 시간 구간을 Chrome trace JSON으로 저장 (chrome://tracing, Perfetto)")
+    parser.add_argument("--trace-memory", action="store_true", help="단계 구간마다 tracemalloc 메모리 사용량 기록")
+    parser.add_argument("--profile", help="모든 스레드(파일 처리, 번역/GLM 스레드 풀)의 cProfile 결과를 합쳐 pstats 파일로 저장")
+    parser.add_argument("-q", "--quiet", action="store_true", help="파일별 로그 숨김")
+    args = parser.parse_args(argv)
+    if args.translate_backend == "glossary" and not args.glossary:
+        parser.error("--translate-backend glossary에는 --glossary 용어집 경로가 필요합니다")
+
+    files = collect_input_files(args.inputs)
+    if not files:
+        print("처리할 PDF/MD 파일이 없습니다.", file=sys.stderr)
+        return 2
+
+    api_key = args.api_key or os.environ.get("GLM_API_KEY") or load_config().get("api_key", "")
+    options = PipelineOptions(
+        source_lang=args.source,
+        target_lang=args.target,
+        extract_images=args.images,
+        page_chunks=args.page_chunks,
+        fix_errors=args.fix,
+        api_key=api_key,
+        glm_model=args.model,
+        output_folder=args.output,
+        translate_workers=max(1, args.translate_workers),
+        translate_batch_chars=min(5000, max(200, args.translate_batch_chars)),
+        translate_backend=args.translate_backend,
+        glossary=args.glossary,
+        translate_url=args.translate_url,
+        translate_api_key=args.translate_api_key,
+        translate_table_cells=not args.translate_table_rows,
+        translate_mask_markup=not args.translate_markup,
+        translate_rate=args.translate_rate,
+        translation_memory=None if args.no_tm else args.tm,
+        translation_memory_max_entries=args.tm_max_entries,
+        glm_cache=None if args.no_glm_cache else args.glm_cache,
+        glm_cache_max_mb=args.glm_cache_max_mb,
+        glm_max_connections=max(1, args.glm_connections),
+        glm_http2=args.http2,
+        glm_concurrency=max(1, args.glm_concurrency),
+        glm_max_concurrency=max(1, args.glm_max_concurrency),
+        glm_retries=max(0, args.glm_retries),
+        glm_timeout=args.glm_timeout,
+        glm_api_url=args.glm_url,
+        glm_chunk_tokens=max(100, args.glm_chunk_tokens),
+        glm_async=args.glm_async,
+        glm_skip_clean=not args.glm_all,
+        local_repair=not args.no_local_repair,
+        glm_fix_spans=args.glm_spans,
+        glm_stream=args.glm_stream,
+        trace_memory=args.trace_memory,
+        cprofile=bool(args.profile),
+        glm_async_concurrency=max(1, args.glm_async_concurrency),
+        streaming=args.stream,
+        stream_queue_size=max(1, args.stream_queue),
+        processes=max(1, args.processes),
+        pages_per_shard=args.pages_per_shard,
+        checkpoint=args.checkpoint if args.resume else None,
+    )
+
+    print_lock = threading.Lock()
+
+    def on_event(event, data):
+        now = datetime.now().strftime('%H:%M:%S')
+        if event == "log" and not args.quiet:
+            line = f"[{now}] [{data.get('source', '-')}] {data['message']}"
+        elif event == "file_done":
+            line = f"[{now}] ({data['done']}/{data['total']}) 완료: {data['path']} → {data['output'] or '건너뜀'}"
+        elif event == "file_error":
+            line = f"[{now}] ({data['done']}/{data['total']}) 오류: {data['path']}: {data['error']}"
+        else:
+            return
+        with print_lock:
+            print(line, file=sys.stderr, flush=True)
+
+    engine = PipelineEngine(options, on_event=on_event)
+    started = time.perf_counter()
+    try:
+        results = engine.run_batch(files, max_workers=args.jobs)
+    finally:
+        engine.close()
+        if args.metrics:
+            engine.metrics.write(args.metrics)
+        if args.trace:
+            engine.tracer.write(args.trace)
+        if args.profile:
+            engine.profiler.dump(args.profile)
+    elapsed = time.perf_counter() - started
+
+    failed = [p for p, r in results.items() if isinstance(r, Exception)]
+    rate = len(files) / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"처리 완료: {len(files) - len(failed)}/{len(files)}개 파일, {elapsed:.1f}초 ({rate:.1f} 파일/분)",
+          file=sys.stderr)
+    total = engine.metrics.snapshot()["total"]
+    if total["calls"]:
+        print(f"GLM: 호출 {total['calls']}회, 토큰 {total['total_tokens']:,}, 예상 비용 ${total['cost_usd']:.4f}",
+              file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
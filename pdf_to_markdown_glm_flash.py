@@ -13,150 +13,16 @@ API Key 발급:
     https://open.bigmodel.cn
 """
 
-import json
-import os
-import re
 import threading
-import httpx
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 
-# 설정 파일 경로 (사용자 홈 디렉토리 - Git에 포함되지 않음)
-CONFIG_FILE = Path.home() / ".pdf_to_markdown_config.json"
-
-LANGUAGES = {
-    "번역 안함": None,
-    "한국어": "ko",
-    "영어": "en",
-    "일본어": "ja",
-    "중국어 (간체)": "zh-CN",
-    "중국어 (번체)": "zh-TW",
-}
-
-SOURCE_LANGUAGES = {
-    "자동 감지": "auto",
-    "중국어 (간체)": "zh-CN",
-    "중국어 (번체)": "zh-TW",
-    "영어": "en",
-    "일본어": "ja",
-    "한국어": "ko",
-}
-
-GLM_SYSTEM_PROMPT = """You are a markdown document fixer. Fix formatting errors in the given markdown.
-DO NOT translate - the text is already translated. Only fix formatting issues.
-
-## Fix these errors:
-
-### 1. Fix Broken Tables
-BAD (cells merged with <br>):
-|Parameter<br>Symbol<br>MIN|value<br>value|
-GOOD (proper columns):
-| Parameter | Symbol | MIN |
-|-----------|--------|-----|
-| value | value | value |
-
-### 2. Fix Garbled Characters
-- Replace "z ", "L ", "l ", "ν ", "nn " at line start with "- "
-- Remove random chars like "肯", "电", "N", "KE", "SA" that don't belong
-
-### 3. Remove Page Numbers
-- Delete standalone lines with just numbers like "1", "2", ... "14"
-
-### 4. Clean Empty Tables
-- Remove tables with only empty cells |||||||||
-
-### 5. Fix Table Structure
-- Ensure proper | column | format
-- Add |---|---| separator after header row
-- Split merged cells into separate columns
-
-Return ONLY the fixed markdown. Keep all Korean/translated text as-is."""
-
-
-def load_config():
-    """설정 파일에서 API 키 로드"""
-    if CONFIG_FILE.exists():
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            pass
-    return {"api_key": ""}
-
-
-def save_config(config):
-    """설정 파일에 API 키 저장"""
-    try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"설정 저장 실패: {e}")
-
-
-def split_markdown_into_chunks(text: str, max_chars: int = 6000) -> list:
-    """마크다운을 청크로 분할 (페이지 구분선 또는 빈 줄 기준)"""
-    # 페이지 구분선으로 먼저 분할 시도
-    if "---\n<!-- Page" in text:
-        parts = re.split(r'(---\n<!-- Page \d+ -->\n)', text)
-        chunks = []
-        current_chunk = ""
-
-        for i, part in enumerate(parts):
-            if len(current_chunk) + len(part) > max_chars and current_chunk:
-                chunks.append(current_chunk)
-                current_chunk = part
-            else:
-                current_chunk += part
-
-        if current_chunk:
-            chunks.append(current_chunk)
-
-        return chunks if len(chunks) > 1 else [text]
-
-    # 빈 줄 2개 이상으로 분할
-    paragraphs = re.split(r'\n{2,}', text)
-    chunks = []
-    current_chunk = ""
-
-    for para in paragraphs:
-        if len(current_chunk) + len(para) + 2 > max_chars and current_chunk:
-            chunks.append(current_chunk)
-            current_chunk = para
-        else:
-            current_chunk += ("\n\n" + para if current_chunk else para)
-
-    if current_chunk:
-        chunks.append(current_chunk)
-
-    return chunks if chunks else [text]
-
-
-def fix_chunk_with_glm(text: str, api_key: str, chunk_num: int, total_chunks: int) -> str:
-    """단일 청크 GLM 처리 (동기)"""
-    url = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": "glm-4-flash",  # 더 빠른 모델
-        "messages": [
-            {"role": "system", "content": GLM_SYSTEM_PROMPT},
-            {"role": "user", "content": f"Fix this markdown (do not translate):\n\n{text}"}
-        ],
-        "max_tokens": 8192,
-        "temperature": 0.1,
-    }
-
-    with httpx.Client(timeout=120.0) as client:
-        response = client.post(url, headers=headers, json=payload)
-        data = response.json()
-        if "choices" in data and data["choices"]:
-            return data["choices"][0]["message"]["content"]
-    return text
+from pdf_to_markdown_cache import GLM_CACHE_FILE, TRANSLATION_MEMORY_FILE
+from pdf_to_markdown_engine import (
+    LANGUAGES, SOURCE_LANGUAGES, PipelineEngine, PipelineOptions, load_config, save_config,
+)
 
 
 class PDFToMarkdownGUI:
@@ -336,19 +202,41 @@ class PDFToMarkdownGUI:
         self.progress_var.set(percent)
         self.progress_label.config(text=f"{int(percent)}%")
 
+    def on_engine_event(self, event, data):
+        """엔진 이벤트 구독 (작업 스레드 → Tk 메인 루프)"""
+        if event == "log":
+            self.root.after(0, lambda m=data["message"]: self.log(m))
+        elif event == "progress":
+            self.root.after(0, lambda p=data["percent"]: self.set_progress(p))
+
+    def build_options(self):
+        return PipelineOptions(
+            source_lang=SOURCE_LANGUAGES.get(self.source_lang.get(), "auto"),
+            target_lang=LANGUAGES.get(self.target_lang.get()),
+            extract_images=self.extract_images.get(),
+            page_chunks=self.page_chunks.get(),
+            fix_errors=self.fix_errors.get() and self.glm_available,
+            api_key=self.api_key.get().strip(),
+            glm_model="glm-4-flash",
+            glm_stream=True,
+            output_folder=self.output_path.get().strip() or None,
+            translation_memory=str(TRANSLATION_MEMORY_FILE),
+            glm_cache=str(GLM_CACHE_FILE),
+        )
+
     def run_processing(self):
         try:
             input_path = Path(self.input_path.get())
-            output_folder = self.output_path.get().strip() or None
             ext = input_path.suffix.lower()
 
-            if ext == '.pdf':
-                self.convert_pdf(input_path, output_folder)
-            elif ext == '.md':
-                if self.target_lang.get() == "번역 안함":
-                    self.root.after(0, lambda: messagebox.showinfo("알림", "MD 파일은 번역 언어를 선택하세요."))
-                else:
-                    self.translate_file(input_path, output_folder)
+            if ext == '.md' and self.target_lang.get() == "번역 안함":
+                self.root.after(0, lambda: messagebox.showinfo("알림", "MD 파일은 번역 언어를 선택하세요."))
+            elif ext in ('.pdf', '.md'):
+                engine = PipelineEngine(self.build_options(), on_event=self.on_engine_event)
+                try:
+                    engine.process_file(input_path)
+                finally:
+                    engine.close()
             else:
                 self.root.after(0, lambda: messagebox.showwarning("지원 안함", f"지원하지 않는 형식: {ext}"))
                 return
@@ -363,261 +251,6 @@ class PDFToMarkdownGUI:
             self.root.after(0, lambda: self.run_btn.config(state=tk.NORMAL))
             self.root.after(0, lambda: self.set_progress(100 if self.status_var.get() == "완료!" else 0))
 
-    def translate_with_google(self, text, source_lang, target_lang):
-        """Google Translate로 번역 (배치 처리)"""
-        from deep_translator import GoogleTranslator
-        import time
-
-        lines = text.split('\n')
-        translator = GoogleTranslator(source=source_lang, target=target_lang)
-        total = len(lines)
-        result = [''] * total
-
-        # 번역할 줄과 스킵할 줄 분류
-        to_translate = []
-        for i, line in enumerate(lines):
-            if not line.strip() or line.strip().startswith('![') or line.strip().startswith('```') or re.match(r'^[\|\-\:\s]+$', line.strip()):
-                result[i] = line
-            else:
-                to_translate.append((i, line))
-
-        # 배치 크기 설정
-        BATCH_SIZE = 15
-        MAX_CHARS = 3500
-
-        batches = []
-        current_batch = []
-        current_chars = 0
-
-        for idx, line in to_translate:
-            line_len = len(line) + 10
-            if current_batch and (len(current_batch) >= BATCH_SIZE or current_chars + line_len > MAX_CHARS):
-                batches.append(current_batch)
-                current_batch = []
-                current_chars = 0
-            current_batch.append((idx, line))
-            current_chars += line_len
-
-        if current_batch:
-            batches.append(current_batch)
-
-        self.root.after(0, lambda: self.log(f"Google 번역: {len(batches)}개 배치 ({len(to_translate)}줄)"))
-
-        # 배치 단위로 번역
-        for batch_num, batch in enumerate(batches):
-            percent = 10 + ((batch_num + 1) / len(batches)) * 40
-            self.root.after(0, lambda p=percent: self.set_progress(p))
-
-            if batch_num > 0 and batch_num % 10 == 0:
-                self.root.after(0, lambda n=batch_num, t=len(batches): self.log(f"번역 진행: {n}/{t} 배치"))
-
-            # 번호 마커로 줄 구분
-            marked_lines = [f"<#{j}#>{line}" for j, (_, line) in enumerate(batch)]
-            combined_text = "\n".join(marked_lines)
-
-            try:
-                translated = translator.translate(combined_text[:4500])
-                if translated:
-                    pattern = r'<#(\d+)#>'
-                    parts = re.split(pattern, translated)
-                    translated_lines = []
-                    for k in range(1, len(parts), 2):
-                        if k + 1 < len(parts):
-                            translated_lines.append(parts[k + 1].strip())
-
-                    for j, (idx, original) in enumerate(batch):
-                        if j < len(translated_lines) and translated_lines[j]:
-                            result[idx] = translated_lines[j]
-                        else:
-                            result[idx] = original
-                else:
-                    for idx, line in batch:
-                        result[idx] = line
-
-                time.sleep(0.1)
-
-            except Exception as e:
-                self.root.after(0, lambda err=str(e)[:50]: self.log(f"배치 오류: {err}"))
-                for idx, line in batch:
-                    result[idx] = line
-
-        self.root.after(0, lambda: self.log(f"Google 번역 완료: {total}줄"))
-        return '\n'.join(result)
-
-    def fix_with_glm_parallel(self, text):
-        """GLM API로 마크다운 오류 수정 (병렬 처리)"""
-        api_key = self.api_key.get().strip()
-
-        chunks = split_markdown_into_chunks(text, max_chars=6000)
-        total_chunks = len(chunks)
-
-        if total_chunks == 1:
-            self.root.after(0, lambda: self.log(f"GLM 처리 중... (1개 청크)"))
-            result = fix_chunk_with_glm(chunks[0], api_key, 1, 1)
-            return result
-
-        self.root.after(0, lambda t=total_chunks: self.log(f"GLM 병렬 처리: {t}개 청크로 분할"))
-
-        results = [None] * total_chunks
-        batch_size = 4
-
-        with ThreadPoolExecutor(max_workers=batch_size) as executor:
-            for i in range(0, total_chunks, batch_size):
-                batch_chunks = chunks[i:i + batch_size]
-                batch_num = i // batch_size + 1
-                total_batches = (total_chunks + batch_size - 1) // batch_size
-
-                self.root.after(0, lambda b=batch_num, t=total_batches, n=len(batch_chunks):
-                    self.log(f"GLM 처리 중... 배치 {b}/{t} ({n}개 청크 병렬)"))
-
-                futures = {
-                    executor.submit(fix_chunk_with_glm, chunk, api_key, i + j + 1, total_chunks): i + j
-                    for j, chunk in enumerate(batch_chunks)
-                }
-
-                for future in as_completed(futures):
-                    idx = futures[future]
-                    try:
-                        results[idx] = future.result()
-                    except Exception as e:
-                        self.root.after(0, lambda err=str(e)[:50]: self.log(f"청크 오류: {err}"))
-                        results[idx] = chunks[idx]
-
-                progress = 55 + ((i + len(batch_chunks)) / total_chunks) * 40
-                self.root.after(0, lambda p=progress: self.set_progress(min(95, p)))
-
-        return "\n\n".join(results)
-
-    def translate_text(self, text, source_lang, target_lang, progress_offset=0, progress_range=100):
-        """Google 번역 후 GLM으로 오류 수정"""
-        if not text.strip():
-            return text
-
-        self.root.after(0, lambda: self.log(f"문서 처리 시작... ({len(text):,} 문자)"))
-        self.root.after(0, lambda: self.set_progress(5))
-
-        result = text
-
-        # 1단계: Google 번역
-        if self.translator_available:
-            self.root.after(0, lambda: self.log("[ 1단계 ] Google 번역 시작..."))
-            try:
-                result = self.translate_with_google(text, source_lang, target_lang)
-                self.root.after(0, lambda: self.log("Google 번역 완료!"))
-            except Exception as e:
-                self.root.after(0, lambda err=str(e): self.log(f"Google 번역 오류: {err}"))
-        else:
-            self.root.after(0, lambda: self.log("경고: Google 번역 불가, 원본 유지"))
-
-        self.root.after(0, lambda: self.set_progress(50))
-
-        # 2단계: GLM 오류 수정 (병렬 처리)
-        if self.fix_errors.get() and self.glm_available and self.api_key.get().strip():
-            self.root.after(0, lambda: self.log("[ 2단계 ] GLM 오류 수정 시작 (병렬 처리)..."))
-            try:
-                result = self.fix_with_glm_parallel(result)
-                self.root.after(0, lambda: self.log("GLM 오류 수정 완료!"))
-            except Exception as e:
-                self.root.after(0, lambda err=str(e): self.log(f"GLM 오류: {err}"))
-        else:
-            if not self.api_key.get().strip():
-                self.root.after(0, lambda: self.log("경고: API Key 없음, 오류 수정 스킵"))
-
-        self.root.after(0, lambda: self.set_progress(95))
-        return result
-
-    def translate_file(self, input_path, output_folder=None):
-        self.root.after(0, lambda: self.log(f"번역: {input_path.name}"))
-        self.root.after(0, lambda: self.set_progress(5))
-        with open(input_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        output_folder = Path(output_folder) if output_folder else input_path.parent
-        output_folder.mkdir(parents=True, exist_ok=True)
-        output_path = output_folder / f"{input_path.stem}_translated.md"
-
-        source = SOURCE_LANGUAGES.get(self.source_lang.get(), "auto")
-        target = LANGUAGES.get(self.target_lang.get(), "ko")
-        self.root.after(0, lambda: self.log(f"번역: {source} → {target}"))
-
-        translated = self.translate_text(content, source, target, progress_offset=5, progress_range=90)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(translated)
-        self.root.after(0, lambda: self.set_progress(100))
-        self.root.after(0, lambda: self.log(f"저장: {output_path}"))
-
-    def sanitize_filename(self, name):
-        """파일명에서 특수문자, 한글, 공백 제거"""
-        sanitized = re.sub(r'[^a-zA-Z0-9]', '', name)
-        return sanitized[:20] if sanitized else "pdf"
-
-    def simplify_image_names(self, image_folder, md_text, rel_folder):
-        """이미지 파일명 간소화"""
-        import shutil
-        image_files = sorted(image_folder.glob("*.*"))
-
-        for i, img_path in enumerate(image_files, 1):
-            ext = img_path.suffix.lower()
-            new_name = f"img_{i:03d}{ext}"
-            new_path = image_folder / new_name
-            old_ref = img_path.name
-
-            if img_path != new_path:
-                shutil.move(str(img_path), str(new_path))
-
-            md_text = md_text.replace(old_ref, new_name)
-
-        md_text = md_text.replace(str(image_folder).replace("\\", "/"), rel_folder)
-        md_text = md_text.replace(str(image_folder), rel_folder)
-
-        self.root.after(0, lambda n=len(image_files): self.log(f"이미지 {n}개 간소화 완료"))
-        return md_text
-
-    def convert_pdf(self, pdf_path, output_folder=None):
-        import pymupdf4llm
-        self.root.after(0, lambda: self.log(f"변환: {pdf_path.name}"))
-        self.root.after(0, lambda: self.set_progress(10))
-
-        output_folder = Path(output_folder) if output_folder else pdf_path.parent
-        output_folder.mkdir(parents=True, exist_ok=True)
-        output_path = output_folder / f"{pdf_path.stem}.md"
-
-        image_folder = None
-        simple_image_folder = None
-        if self.extract_images.get():
-            simple_name = self.sanitize_filename(pdf_path.stem)
-            simple_image_folder = output_folder / f"{simple_name}_images"
-            simple_image_folder.mkdir(parents=True, exist_ok=True)
-            image_folder = simple_image_folder
-
-        rel_image_folder = f"./{simple_image_folder.name}" if simple_image_folder else None
-
-        if self.page_chunks.get():
-            chunks = pymupdf4llm.to_markdown(str(pdf_path), page_chunks=True, write_images=self.extract_images.get(), image_path=str(image_folder) if image_folder else None)
-            md_text = ""
-            for i, chunk in enumerate(chunks):
-                md_text += chunk.get('text', '') if isinstance(chunk, dict) else str(chunk)
-                md_text += f"\n\n---\n<!-- Page {i+1} -->\n\n"
-        else:
-            md_text = pymupdf4llm.to_markdown(str(pdf_path), write_images=self.extract_images.get(), image_path=str(image_folder) if image_folder else None)
-
-        if image_folder and image_folder.exists():
-            md_text = self.simplify_image_names(image_folder, md_text, rel_image_folder)
-
-        self.root.after(0, lambda: self.set_progress(40))
-        self.root.after(0, lambda: self.log("PDF 변환 완료"))
-
-        if self.target_lang.get() != "번역 안함" and self.translator_available:
-            source = SOURCE_LANGUAGES.get(self.source_lang.get(), "auto")
-            target = LANGUAGES.get(self.target_lang.get(), "ko")
-            self.root.after(0, lambda: self.log(f"번역: {source} → {target}"))
-            md_text = self.translate_text(md_text, source, target, progress_offset=40, progress_range=55)
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(md_text)
-        self.root.after(0, lambda: self.set_progress(100))
-        self.root.after(0, lambda: self.log(f"저장: {output_path}"))
-
 
 def main():
     root = tk.Tk()
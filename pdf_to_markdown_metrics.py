@@ -0,0 +1,122 @@
+"""
+PDF to Markdown GLM API 지표
+- 호출마다 입력/출력 토큰, 지연, 재시도, 송수신 바이트, 캐시 적중, 오류 기록
+- 문서별 + 실행 전체 합계, 예상 비용 (모델별 1M 토큰 단가)
+- JSON / Prometheus 텍스트 형식으로 내보내기
+"""
+
+import json
+import threading
+from pathlib import Path
+
+# 모델별 1M 토큰당 가격 (USD, 입력/출력 동일)
+GLM_PRICES = {
+    "glm-4-flash": 0.01,
+    "glm-4-plus": 7.00,
+}
+
+COUNTERS = (
+    "calls", "errors", "retries", "cache_hits", "prompt_tokens", "completion_tokens", "total_tokens",
+    "bytes_sent", "bytes_received", "latency_seconds",
+)
+
+
+def empty_counters() -> dict:
+    counters = dict.fromkeys(COUNTERS, 0)
+    counters["latency_seconds"] = 0.0
+    counters["latency_max_seconds"] = 0.0
+    counters["cost_usd"] = 0.0
+    return counters
+
+
+class GLMMetrics:
+    """GLM API 호출 지표 집계 (여러 스레드/이벤트 루프에서 공유 가능)"""
+
+    def __init__(self, prices=None):
+        self.prices = dict(GLM_PRICES if prices is None else prices)
+        self.lock = threading.Lock()
+        self.total = empty_counters()
+        self.documents = {}
+
+    def _add(self, document, **values):
+        targets = [self.total]
+        if document:
+            targets.append(self.documents.setdefault(document, empty_counters()))
+        for counters in targets:
+            for name, value in values.items():
+                if name == "latency_max_seconds":
+                    counters[name] = max(counters[name], value)
+                else:
+                    counters[name] += value
+
+    def record_call(self, document, model, prompt_tokens=0, completion_tokens=0, latency=0.0,
+                    bytes_sent=0, bytes_received=0, error=False):
+        """API 호출 한 번 기록 (실패한 시도도 error=True로 기록)"""
+        tokens = prompt_tokens + completion_tokens
+        with self.lock:
+            self._add(
+                document,
+                calls=1,
+                errors=1 if error else 0,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=tokens,
+                bytes_sent=bytes_sent,
+                bytes_received=bytes_received,
+                latency_seconds=latency,
+                latency_max_seconds=latency,
+                cost_usd=tokens / 1_000_000 * self.prices.get(model, 0.0),
+            )
+
+    def record_cache_hit(self, document):
+        with self.lock:
+            self._add(document, cache_hits=1)
+
+    def record_retries(self, document, count):
+        if count:
+            with self.lock:
+                self._add(document, retries=count)
+
+    def document(self, document) -> dict:
+        with self.lock:
+            return dict(self.documents.get(document) or empty_counters())
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "total": dict(self.total),
+                "documents": {name: dict(counters) for name, counters in self.documents.items()},
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 형식
+
+        실행 전체 합계는 pdf_to_markdown_glm_*, 문서별 값은 document 레이블이 붙은 pdf_to_markdown_glm_document_*로
+        이름을 나눠 sum()이 두 번 세지 않게 한다. 누적 값(counter)은 _total로 끝난다.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name in (*COUNTERS, "latency_max_seconds", "cost_usd"):
+            kind = "gauge" if name == "latency_max_seconds" else "counter"
+            suffix = "_total" if kind == "counter" else ""
+            metric = f"pdf_to_markdown_glm_{name}{suffix}"
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {snapshot['total'][name]}")
+            if not snapshot["documents"]:
+                continue
+            metric = f"pdf_to_markdown_glm_document_{name}{suffix}"
+            lines.append(f"# TYPE {metric} {kind}")
+            for document, counters in snapshot["documents"].items():
+                label = document.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                lines.append(f'{metric}{{document="{label}"}} {counters[name]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """스냅샷 저장 (.json이면 JSON, 그 외에는 Prometheus 텍스트)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = self.to_json() if path.suffix.lower() == ".json" else self.to_prometheus()
+        path.write_text(text, encoding='utf-8')
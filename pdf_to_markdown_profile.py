@@ -0,0 +1,162 @@
+"""
+PDF to Markdown 단계별 시간 측정 / 프로파일링
+- 단계 구간(span): 변환, 이미지 이름 정리, 번역 배치, GLM 청크 등 이름별 시작/소요 시간 기록
+- 실행 후 Chrome trace JSON (chrome://tracing, Perfetto) 또는 단계별 합계로 내보내기
+- 선택: tracemalloc 메모리 측정 (구간별 할당 증가량), 프로세스 전체(모든 스레드) cProfile 수집
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class StageTracer:
+    """단계 구간 기록기 (여러 스레드에서 공유 가능)
+
+    memory=True면 tracemalloc을 켜고 구간마다 할당 증가량과 최고 사용량을 함께 기록한다.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.lock = threading.Lock()
+        self.events = []
+        self.origin = time.perf_counter()
+        if memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    @contextmanager
+    def span(self, name, document=None, **args):
+        """with tracer.span("translate", document=...): 구간 하나 기록"""
+        if self.memory:
+            import tracemalloc
+            mem_start = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                args["mem_delta_kb"] = (current - mem_start) // 1024
+                args["mem_peak_kb"] = peak // 1024
+            self.record(name, started, time.perf_counter() - started, document, **args)
+
+    def record(self, name, started, duration, document=None, **args):
+        """이미 잰 구간 기록 (started는 time.perf_counter() 값)"""
+        if document:
+            args["document"] = document
+        with self.lock:
+            self.events.append((name, started - self.origin, duration, threading.get_ident(), args))
+
+    def summary(self, document=None) -> dict:
+        """구간 이름별 {count, total_seconds, max_seconds} (document를 주면 그 문서 구간만)"""
+        with self.lock:
+            events = list(self.events)
+        result = {}
+        for name, _, duration, _, args in events:
+            if document is not None and args.get("document") != document:
+                continue
+            stats = result.setdefault(name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["count"] += 1
+            stats["total_seconds"] += duration
+            stats["max_seconds"] = max(stats["max_seconds"], duration)
+        return result
+
+    def to_chrome_trace(self) -> dict:
+        """Chrome trace 형식 (완료 이벤트 "X", 시간 단위 마이크로초)"""
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+        trace = [
+            {"name": name, "cat": "pipeline", "ph": "X", "ts": round(start * 1e6), "dur": round(duration * 1e6),
+             "pid": pid, "tid": tid, "args": args}
+            for name, start, duration, tid, args in events
+        ]
+        return {"traceEvents": trace, "displayTimeUnit": "ms", "summary": self.summary()}
+
+    def write(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace(), ensure_ascii=False), encoding='utf-8')
+
+
+def _clear_thread_profiles():
+    """Python 3.12 전: 모든 스레드의 프로파일 훅 제거 (3.12의 threading.setprofile_all_threads(None)과 같음)
+
+    CPython이 아니거나 API가 없으면 아무것도 하지 않는다.
+    """
+    try:
+        import ctypes
+        api = ctypes.pythonapi
+        set_profile = api._PyEval_SetProfile
+    except (ImportError, AttributeError):
+        return
+    api.PyInterpreterState_Main.restype = ctypes.c_void_p
+    api.PyInterpreterState_ThreadHead.argtypes = [ctypes.c_void_p]
+    api.PyInterpreterState_ThreadHead.restype = ctypes.c_void_p
+    api.PyThreadState_Next.argtypes = [ctypes.c_void_p]
+    api.PyThreadState_Next.restype = ctypes.c_void_p
+    set_profile.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
+    set_profile.restype = ctypes.c_int
+    # pythonapi 호출은 GIL을 쥔 채 실행되므로 순회 중 스레드 목록이 바뀌지 않음
+    state = api.PyInterpreterState_ThreadHead(api.PyInterpreterState_Main())
+    while state:
+        set_profile(state, None, None)
+        state = api.PyThreadState_Next(state)
+
+
+class ProcessProfiler:
+    """프로세스 전체 cProfile - start()부터 stop()까지 모든 스레드(파일 처리, 번역/GLM 스레드 풀 포함)를 기록
+
+    Python 3.12부터는 프로파일러를 하나만 켤 수 있고, 켜 둔 하나가 모든 스레드의 호출을 받는다.
+    그 전 버전은 프로파일러가 켠 스레드만 기록하므로 threading.setprofile로 새 스레드마다 따로 켜고 dump()에서 합친다.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.profiles = []
+
+    def start(self):
+        import cProfile
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._start_thread)
+        profile.enable()
+
+    def _start_thread(self, frame, event, arg):
+        # 새 스레드의 첫 이벤트에서 그 스레드 전용 프로파일러로 바꿈 (enable()이 이 훅을 대체)
+        import cProfile
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def stop(self):
+        """모든 프로파일러를 끔 - 이후 dump()가 읽는 동안 다른 스레드가 기록을 늘리지 않음"""
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+            # disable()은 부른 스레드의 훅만 지우므로, 스레드마다 켠 프로파일러의 훅은 직접 지움
+            _clear_thread_profiles()
+        with self.lock:
+            profiles = list(self.profiles)
+        for profile in profiles:
+            profile.disable()
+
+    def dump(self, path):
+        """모든 스레드의 결과를 합쳐 pstats 파일로 저장 (python -m pstats, snakeviz 등으로 확인)"""
+        import pstats
+        with self.lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(str(path))
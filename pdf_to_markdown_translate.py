@@ -0,0 +1,420 @@
+"""
+PDF to Markdown 번역 백엔드
+- 공통 인터페이스: translate_batch(텍스트 목록) → 같은 길이의 번역 목록 (실패한 항목은 None)
+  max_batch_chars(요청당 문자 예산), concurrency(권장 동시 배치 수) 힌트를 엔진의 배치 묶기/동시 처리에 사용
+- GoogleBackend: deep_translator GoogleTranslator (무료 공개 엔드포인트, 번호 마커로 여러 줄을 한 요청에)
+- GlossaryBackend: 디스크의 용어집(TSV/JSON)으로 줄 전체 또는 용어를 치환 (네트워크 없음, CPU만 사용)
+- LibreTranslateBackend: LibreTranslate 호환 자체 호스팅 번역 서버 (로컬 모델 서버)
+"""
+
+import hashlib
+import importlib.util
+import json
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+GOOGLE_BATCH_CHARS = 4500  # 번역 요청 하나의 최대 문자 수 (deep_translator 한도 5000자, 여유분 제외)
+
+
+# 번역 후 공백이 끼거나 전각 문자로 바뀐 마커도 인식 (<# 3 #>, ＜＃3＃＞)
+BATCH_MARKER_RE = re.compile(r'[<＜]\s*[#＃]\s*(\d+)\s*[#＃]\s*[>＞]')
+
+
+def mark_batch(lines) -> str:
+    """배치의 줄마다 번호 마커를 붙여 한 텍스트로"""
+    return "\n".join(f"<#{j}#>{line}" for j, line in enumerate(lines))
+
+
+def parse_marked_batch(translated: str, count: int) -> list:
+    """번역된 배치를 줄별로 나눔 (정렬 검증), 어긋난 줄은 None
+
+    마커 j가 한 번만 나오고 바로 다음 마커가 j+1(마지막 줄이면 텍스트 끝)이며 내용이 있을 때만 받아들인다.
+    마커가 빠져 두 줄이 합쳐지면 앞 줄과 빠진 줄이, 첫 마커 앞에 글이 밀려 나오면 그 마커의 줄이 어긋난 것으로 처리된다.
+    """
+    result = [None] * count
+    matches = list(BATCH_MARKER_RE.finditer(translated))
+    numbers = [int(match.group(1)) for match in matches]
+    seen = Counter(numbers)
+    for k, match in enumerate(matches):
+        j = numbers[k]
+        if j >= count or seen[j] != 1:
+            continue
+        if k == 0 and translated[:match.start()].strip():
+            continue
+        if k + 1 < len(matches):
+            if numbers[k + 1] != j + 1:
+                continue
+            end = matches[k + 1].start()
+        elif j == count - 1:
+            end = len(translated)
+        else:
+            continue
+        text = translated[match.end():end].strip()
+        if text:
+            result[j] = text
+    return result
+
+
+def is_throttle_error(exc) -> bool:
+    """429(요청 과다) 또는 5xx 서버 오류로 보이는 예외인지 판단"""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(key in text for key in ("429", "too many", "toomanyrequests", "rate limit",
+                                       "500", "502", "503", "504", "server error"))
+
+
+def retry_after_seconds(exc):
+    """예외에 붙은 HTTP 응답의 Retry-After(초) 값, 없거나 날짜 형식이면 None"""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    try:
+        return min(60.0, max(0.0, float(value))) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveRateLimiter:
+    """토큰 버킷 속도 제한 - 429/5xx 시 속도 절반 + 대기, 성공하면 조금씩 다시 가속 (AIMD)"""
+
+    def __init__(self, rate=5.0, burst=1, min_rate=0.2, max_rate=50.0, increase=0.2):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff = 0.0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - max(self.updated, self.blocked_until)) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.backoff = 0.0
+
+    def on_throttle(self, retry_after=None):
+        """요청 과다/서버 오류 - 속도를 줄이고 지수 백오프만큼 모든 요청을 멈춤"""
+        with self.lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.backoff = min(30.0, self.backoff * 2 if self.backoff else 1.0)
+            self.tokens = 0.0
+            self.blocked_until = time.monotonic() + (retry_after if retry_after is not None else self.backoff)
+
+
+class TranslationBackend:
+    """번역 백엔드 공통 인터페이스
+
+    max_batch_chars: 요청 하나에 묶을 최대 문자 수 (엔진이 이 예산으로 배치를 묶음)
+    concurrency: 권장 동시 배치 수 (None이면 엔진 설정 translate_workers 사용)
+    requires: 번역에 필요한 선택 패키지 (모듈 이름, pip 패키지 이름), 없으면 None
+    """
+
+    name = "base"
+    max_batch_chars = GOOGLE_BATCH_CHARS
+    concurrency = None
+    requires = None
+
+    @property
+    def cache_key(self) -> str:
+        """같은 입력에 같은 번역을 내는 설정 식별자 (체크포인트 키에 사용)"""
+        return self.name
+
+    def is_available(self) -> bool:
+        """필요한 패키지가 설치되어 있는지"""
+        return self.requires is None or importlib.util.find_spec(self.requires[0]) is not None
+
+    def translate_batch(self, texts, source_lang, target_lang, info=None) -> list:
+        """texts를 번역해 같은 순서의 목록 반환 (번역하지 못한 항목은 None)
+
+        요청 전체가 실패하면 예외를 올린다. info(dict)를 넘기면 백엔드별 통계를 더한다.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class GoogleBackend(TranslationBackend):
+    """deep_translator GoogleTranslator - 줄마다 번호 마커를 붙여 한 요청으로 보냄
+
+    요청 속도는 모든 스레드가 공유하는 토큰 버킷으로 제한한다 (429/5xx에 감속 후 재시도).
+    마커가 어긋난 줄은 그 구간만 다시 보내고, 구간 전체가 어긋나면 반씩 나눠 재시도한다.
+    split_on_error면 요청 자체가 실패한 배치도 반씩 나눠 재시도한다 (아니면 예외를 올림).
+    info에는 realigned_lines(어긋난 줄), retry_requests(복구용 추가 요청), throttled(429/5xx)를 더한다.
+    """
+
+    name = "google"
+    requires = ("deep_translator", "deep-translator")
+
+    def __init__(self, rate=5.0, concurrency=4, max_batch_chars=GOOGLE_BATCH_CHARS, split_on_error=False):
+        self.concurrency = concurrency
+        self.max_batch_chars = max_batch_chars
+        self.split_on_error = split_on_error
+        self.limiter = AdaptiveRateLimiter(rate=rate, burst=concurrency)
+        self.local = threading.local()
+
+    def translator(self, source_lang, target_lang):
+        """스레드마다 별도 번역기 (언어 쌍별)"""
+        from deep_translator import GoogleTranslator
+
+        cache = self.local.__dict__.setdefault("translators", {})
+        key = (source_lang, target_lang)
+        if key not in cache:
+            cache[key] = GoogleTranslator(source=source_lang, target=target_lang)
+        return cache[key]
+
+    def request(self, text, source_lang, target_lang, info):
+        for attempt in range(4):
+            self.limiter.acquire()
+            try:
+                translated = self.translator(source_lang, target_lang).translate(text)
+                self.limiter.on_success()
+                return translated
+            except Exception as e:
+                if attempt == 3 or not is_throttle_error(e):
+                    raise
+                self.limiter.on_throttle()
+                info["throttled"] += 1
+
+    def translate_batch(self, texts, source_lang, target_lang, info=None) -> list:
+        info = {} if info is None else info
+        for key in ("realigned_lines", "retry_requests", "throttled"):
+            info.setdefault(key, 0)
+        return self._translate(list(texts), source_lang, target_lang, info, retry=False)
+
+    def _translate(self, texts, source_lang, target_lang, info, retry):
+        """어긋난 줄 하나는 줄 단위 재번역(N회) 대신 추가 요청 몇 번(최악 log N 수준)으로 복구된다"""
+        if retry:
+            info["retry_requests"] += 1
+        half = len(texts) // 2
+        try:
+            if len(texts) == 1:
+                translated = (self.request(texts[0], source_lang, target_lang, info) or "").strip()
+                return [translated or None]
+            translated = self.request(mark_batch(texts), source_lang, target_lang, info)
+        except Exception:
+            if not retry and not self.split_on_error:
+                raise
+            if len(texts) == 1 or not self.split_on_error:
+                return [None] * len(texts)
+            return (self._translate(texts[:half], source_lang, target_lang, info, True)
+                    + self._translate(texts[half:], source_lang, target_lang, info, True))
+
+        aligned = parse_marked_batch(translated or "", len(texts))
+        bad = [j for j, text in enumerate(aligned) if text is None]
+        if bad and not retry:
+            info["realigned_lines"] += len(bad)
+        if len(bad) == len(texts):
+            return (self._translate(texts[:half], source_lang, target_lang, info, True)
+                    + self._translate(texts[half:], source_lang, target_lang, info, True))
+
+        runs = []  # 어긋난 줄의 연속 구간
+        for j in bad:
+            if runs and runs[-1][-1] == j - 1:
+                runs[-1].append(j)
+            else:
+                runs.append([j])
+        for run in runs:
+            retried = self._translate([texts[j] for j in run], source_lang, target_lang, info, True)
+            for j, text in zip(run, retried):
+                aligned[j] = text
+        return aligned
+
+
+# 용어집 토큰: 한자/가나는 글자 하나씩, 나머지는 단어 단위
+GLOSSARY_TOKEN_RE = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]|\w+')
+
+
+def load_glossary(path) -> dict:
+    """용어집 파일 읽기 {원문: 번역}
+
+    .json: {"원문": "번역", ...}
+    그 외: 한 줄에 "원문<탭>번역" (빈 줄과 #으로 시작하는 줄은 무시)
+    """
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix.lower() == ".json":
+        return {str(source): str(target) for source, target in json.loads(text).items()}
+    entries = {}
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith('#') or '\t' not in line:
+            continue
+        source, target = line.split('\t', 1)
+        entries[source.strip()] = target.strip()
+    return entries
+
+
+class GlossaryBackend(TranslationBackend):
+    """디스크 용어집으로 번역 (네트워크 없음, CPU만 사용)
+
+    줄 전체가 용어집에 있으면 그 번역을 쓰고, 아니면 가장 긴 용어부터 찾아 치환한다 (대소문자 무시).
+    용어가 하나도 없는 줄은 None(번역 안 됨)으로 돌려줘 원문이 유지되고 번역 메모리에도 남지 않는다.
+    """
+
+    name = "glossary"
+    max_batch_chars = 100_000
+    concurrency = 1  # 순수 CPU 작업이라 스레드를 늘려도 빨라지지 않음
+
+    def __init__(self, path=None, entries=None):
+        entries = dict(entries or {})
+        if path:
+            entries.update(load_glossary(path))
+        digest = hashlib.sha256(json.dumps(sorted(entries.items()), ensure_ascii=False).encode('utf-8'))
+        self.digest = digest.hexdigest()[:16]
+        self.lines = {}  # 정규화된 줄 → 번역
+        self.terms = {}  # 소문자 토큰 튜플 → 번역
+        self.max_words = 1
+        for source, target in entries.items():
+            tokens = tuple(token.lower() for token in GLOSSARY_TOKEN_RE.findall(source))
+            if not tokens or not target:
+                continue
+            self.lines[" ".join(source.lower().split())] = target
+            self.terms[tokens] = target
+            self.max_words = max(self.max_words, len(tokens))
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.digest}"
+
+    def translate_one(self, text):
+        whole = self.lines.get(" ".join(text.lower().split()))
+        if whole is not None:
+            return whole
+        tokens = list(GLOSSARY_TOKEN_RE.finditer(text))
+        out = []
+        last = 0
+        replaced = False
+        i = 0
+        while i < len(tokens):
+            for size in range(min(self.max_words, len(tokens) - i), 0, -1):
+                span = tokens[i:i + size]
+                # 용어 안의 토큰 사이에는 공백/하이픈만 허용 (문장 부호를 넘어 이어 붙이지 않음)
+                if any(text[a.end():b.start()].strip(" -") for a, b in zip(span, span[1:])):
+                    continue
+                target = self.terms.get(tuple(token.group(0).lower() for token in span))
+                if target is not None:
+                    out.append(text[last:span[0].start()])
+                    out.append(target)
+                    last = span[-1].end()
+                    replaced = True
+                    i += size
+                    break
+            else:
+                i += 1
+        if not replaced:
+            return None
+        out.append(text[last:])
+        return "".join(out)
+
+    def translate_batch(self, texts, source_lang, target_lang, info=None) -> list:
+        return [self.translate_one(text) for text in texts]
+
+
+LIBRETRANSLATE_URL = "http://127.0.0.1:5000/translate"
+# LibreTranslate 언어 코드가 Google과 다른 경우
+LIBRETRANSLATE_CODES = {"zh-CN": "zh", "zh-TW": "zt"}
+
+
+class LibreTranslateBackend(TranslationBackend):
+    """LibreTranslate 호환 자체 호스팅 번역 서버 (POST /translate, q에 문자열 목록)
+
+    로컬/사내 모델 서버로 대량 번역을 보낼 때 사용한다 (무료 공개 엔드포인트의 속도 제한 없음).
+    서버가 바쁠 때(429/5xx)는 GoogleBackend처럼 공유 토큰 버킷으로 감속 후 재시도하고
+    (Retry-After가 있으면 그만큼 대기), 재시도를 다 써야 예외를 올린다. info에는 throttled를 더한다.
+    """
+
+    name = "libretranslate"
+    requires = ("httpx", "httpx")
+
+    def __init__(self, url=LIBRETRANSLATE_URL, api_key=None, concurrency=8,
+                 max_batch_chars=20_000, timeout=120.0, rate=5.0):
+        self.url = url
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.max_batch_chars = max_batch_chars
+        self.timeout = timeout
+        self.limiter = AdaptiveRateLimiter(rate=rate, burst=concurrency)
+        self.lock = threading.Lock()
+        self._client = None
+
+    @property
+    def client(self):
+        """공유 httpx 클라이언트 (처음 요청할 때 생성)"""
+        with self.lock:
+            if self._client is None:
+                import httpx
+
+                self._client = httpx.Client(timeout=self.timeout,
+                                            limits=httpx.Limits(max_connections=self.concurrency))
+            return self._client
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.url}"
+
+    def request(self, payload, info):
+        for attempt in range(4):
+            self.limiter.acquire()
+            try:
+                response = self.client.post(self.url, json=payload)
+                response.raise_for_status()
+                data = response.json()
+                self.limiter.on_success()
+                return data
+            except Exception as e:
+                if attempt == 3 or not is_throttle_error(e):
+                    raise
+                self.limiter.on_throttle(retry_after_seconds(e))
+                info["throttled"] += 1
+
+    def translate_batch(self, texts, source_lang, target_lang, info=None) -> list:
+        texts = list(texts)
+        payload = {
+            "q": texts,
+            "source": LIBRETRANSLATE_CODES.get(source_lang, source_lang or "auto"),
+            "target": LIBRETRANSLATE_CODES.get(target_lang, target_lang),
+            "format": "text",
+        }
+        if self.api_key:
+            payload["api_key"] = self.api_key
+        info = {} if info is None else info
+        info.setdefault("throttled", 0)
+        translated = self.request(payload, info).get("translatedText")
+        if isinstance(translated, str):
+            translated = [translated]
+        if not isinstance(translated, list) or len(translated) != len(texts):
+            raise ValueError("번역 서버 응답 개수가 요청과 다름")
+        return [str(text).strip() or None for text in translated]
+
+    def close(self):
+        with self.lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+TRANSLATION_BACKENDS = ("google", "glossary", "libretranslate")
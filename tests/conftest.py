@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 저장소 루트의 pdf_to_markdown_*.py 모듈을 그대로 import
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
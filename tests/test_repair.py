@@ -0,0 +1,83 @@
+"""로컬 규칙 수정(repair_markdown)과 결함 검사(find_markdown_defects) 회귀 테스트"""
+
+import pytest
+
+from pdf_to_markdown_engine import TABLE_SEPARATOR_RE, find_markdown_defects, repair_markdown
+
+
+@pytest.mark.parametrize("row", [
+    "|---|---|",
+    "|-|-|",
+    "| :-: | - |",
+    "|:--|--:|",
+    "--- | ---",
+])
+def test_separator_accepts_gfm_delimiters(row):
+    assert TABLE_SEPARATOR_RE.match(row)
+
+
+@pytest.mark.parametrize("row", ["| a | b |", "| - a | b |", "|:|:|"])
+def test_separator_rejects_data_rows(row):
+    assert not TABLE_SEPARATOR_RE.match(row)
+
+
+@pytest.mark.parametrize("text", [
+    "| a | b |\n|-|-|\n| 1 | 2 |",
+    "| a | b |\n| :-: | - |\n| 1 | 2 |",
+    "| a | b |\n|---|---|\n| 1 | 2 |",
+])
+def test_valid_tables_are_untouched(text):
+    fixed, counts = repair_markdown(text)
+    assert fixed == text
+    assert counts["separators"] == 0
+    assert find_markdown_defects(text) == []
+
+
+def test_separator_inserted_when_missing():
+    fixed, counts = repair_markdown("| a | b |\n| 1 | 2 |")
+    assert fixed == "| a | b |\n|---|---|\n| 1 | 2 |"
+    assert counts["separators"] == 1
+
+
+def test_single_pipe_line_is_not_a_table():
+    text = "x\n| stray | pipe |\ny"
+    assert repair_markdown(text)[0] == text
+
+
+def test_br_and_mismatched_tables_left_for_glm():
+    for text in ("| a | b |\n| c<br>d | e |", "| a | b |\n| 1 | 2 | 3 |"):
+        assert repair_markdown(text)[0] == text
+        assert find_markdown_defects(text)
+
+
+def test_page_numbers_and_empty_tables_removed_without_extra_gap():
+    assert repair_markdown("a\n\n12\n\nb")[0] == "a\n\nb"
+    assert repair_markdown("a\n\n| | |\n|---|---|\n\nb")[0] == "a\n\nb"
+    assert repair_markdown("a\n\n\n\nb")[0] == "a\n\n\n\nb"
+
+
+def test_code_fences_untouched():
+    text = "```\n12\nz item\n| a | b |\n```"
+    assert repair_markdown(text)[0] == text
+
+
+def test_bullet_artifacts_rewritten():
+    fixed, counts = repair_markdown("z First item\n  ν 두 번째")
+    assert fixed == "- First item\n  - 두 번째"
+    assert counts["bullets"] == 2
+
+
+@pytest.mark.parametrize("text", ["l love this", "L = 10 mm", "L Item", "z 3 axes"])
+def test_ambiguous_bullet_lines_not_rewritten(text):
+    assert repair_markdown(text)[0] == text
+
+
+def test_deleted_leading_table_leaves_no_blank_line():
+    assert repair_markdown("||||\n||||\n\ntext")[0] == "text"
+    assert repair_markdown("12\n\ntext")[0] == "text"
+
+
+def test_escaped_pipe_is_not_a_column():
+    text = "| a \\| b | c |\n|---|---|\n| 1 | 2 |"
+    assert find_markdown_defects(text) == []
+    assert repair_markdown("| a \\| b | c |\n| 1 | 2 |")[0] == "| a \\| b | c |\n|---|---|\n| 1 | 2 |"